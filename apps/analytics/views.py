@@ -2,6 +2,8 @@ import json
 from collections import Counter
 
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import Avg, F, FloatField
+from django.db.models.functions import Upper
 from django.shortcuts import render
 from taggit.models import TaggedItem
 
@@ -29,47 +31,24 @@ def index(request):
     user_skill_counts = Counter(user_tags_upper)
     user_skill_counts_json = json.dumps(dict(user_skill_counts))
 
-    job_salary_data = (
-        Job.objects.exclude(salary_range__isnull=True)
-        .exclude(salary_range="")
-        .values_list("tags__name", "salary_range")
+    salary_jobs = Job.objects.filter(salary_min__isnull=False).annotate(
+        salary=(F("salary_min") + F("salary_max")) / 2.0
     )
-    salary_by_language = {}
-    for tag, salary in job_salary_data:
-        if tag:
-            tag = tag.upper()
-            try:
-                salary = float(salary)
-                salary_by_language.setdefault(tag, []).append(salary)
-            except (ValueError, TypeError):
-                continue
 
     average_salary_by_language = {
-        tag: sum(salaries) / len(salaries)
-        for tag, salaries in salary_by_language.items()
-        if len(salaries) > 0
+        row["tag"]: row["average"]
+        for row in salary_jobs.exclude(tags__name__isnull=True)
+        .annotate(tag=Upper("tags__name"))
+        .values("tag")
+        .annotate(average=Avg("salary", output_field=FloatField()))
     }
     average_salary_json = json.dumps(average_salary_by_language)
 
-    job_tenure_data = (
-        Job.objects.exclude(tenure__isnull=True)
-        .exclude(salary_range__isnull=True)
-        .exclude(salary_range="")
-        .values_list("tenure", "salary_range")
-    )
-
-    salary_by_tenure = {}
-    for tenure, salary in job_tenure_data:
-        try:
-            salary = float(salary)
-            salary_by_tenure.setdefault(tenure, []).append(salary)
-        except (ValueError, TypeError):
-            continue
-
     average_salary_by_tenure = {
-        tenure: sum(salaries) / len(salaries)
-        for tenure, salaries in salary_by_tenure.items()
-        if len(salaries) > 0
+        row["tenure"]: row["average"]
+        for row in salary_jobs.exclude(tenure__isnull=True)
+        .values("tenure")
+        .annotate(average=Avg("salary", output_field=FloatField()))
     }
 
     average_tenure_salary_json = json.dumps(average_salary_by_tenure)
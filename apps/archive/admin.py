@@ -0,0 +1,39 @@
+from django.contrib import admin, messages
+from django.db import transaction
+
+from .archiver import RestoreError, restore_batch
+from .models import ArchivedRow
+
+
+@admin.register(ArchivedRow)
+class ArchivedRowAdmin(admin.ModelAdmin):
+    list_display = ["model_label", "object_id", "deleted_at", "archived_at", "batch"]
+    list_filter = ["model_label", "archived_at"]
+    search_fields = ["object_id", "batch"]
+    readonly_fields = [
+        "batch",
+        "position",
+        "model_label",
+        "object_id",
+        "data",
+        "nulled_references",
+        "deleted_at",
+        "archived_at",
+    ]
+    actions = ["restore"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="還原所選資料（連同同一批的關聯資料）")
+    def restore(self, request, queryset):
+        batches = set(queryset.values_list("batch", flat=True))
+        try:
+            with transaction.atomic():
+                rows = sum(restore_batch(batch) for batch in batches)
+        except RestoreError as error:
+            self.message_user(request, f"還原失敗：{error}", messages.ERROR)
+            return
+        self.message_user(
+            request, f"已還原 {len(batches)} 批，共 {rows} 列", messages.SUCCESS
+        )
@@ -0,0 +1,214 @@
+import json
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from itertools import groupby
+
+from django.apps import apps
+from django.conf import settings
+from django.core import serializers
+from django.db import router, transaction
+from django.db.models.deletion import Collector
+from django.utils import timezone
+
+from .models import ArchivedRow
+
+# 先搬子資料，公司留到最後，連帶刪除的範圍才會最小
+ARCHIVED_MODELS = [
+    "posts.Comment",
+    "posts.Post",
+    "jobs.Job",
+    "resumes.Resume",
+    "companies.Company",
+]
+
+
+class RestoreError(Exception):
+    """還原需要的上層資料既不在主表、也不在封存表裡。"""
+
+
+def retention():
+    return timedelta(days=getattr(settings, "ARCHIVE_RETENTION_DAYS", 90))
+
+
+def is_soft_deletable(model):
+    return any(field.name == "deleted_at" for field in model._meta.concrete_fields)
+
+
+def collect(instance):
+    collector = Collector(using=router.db_for_write(type(instance)), origin=instance)
+    collector.collect([instance])
+
+    rows = []
+    for model, instances in collector.data.items():
+        rows.extend(instances)
+    for queryset in collector.fast_deletes:
+        rows.extend(queryset)
+    return collector, rows
+
+
+def nulled_references(collector):
+    """
+    刪除時被 SET_NULL 清掉的外鍵（例如指向這筆職缺的 Job.duplicate_of），
+    記下原本的值，還原時才接得回去。
+    """
+    references = []
+    for (field, value), instances_list in collector.field_updates.items():
+        if value is not None:
+            continue
+        pks_by_target = defaultdict(list)
+        for instances in instances_list:
+            for instance in instances:
+                pks_by_target[getattr(instance, field.attname)].append(instance.pk)
+        references.extend(
+            {
+                "model": field.model._meta.label_lower,
+                "field": field.attname,
+                "value": target,
+                "pks": pks,
+            }
+            for target, pks in pks_by_target.items()
+        )
+    return references
+
+
+def touches_live_rows(instance, rows):
+    """連帶刪除會波及還沒軟刪除的資料（例如公司底下仍上架的職缺）就不搬。"""
+    return any(
+        row is not instance and is_soft_deletable(type(row)) and row.deleted_at is None
+        for row in rows
+    )
+
+
+def archive_instance(instance):
+    collector, rows = collect(instance)
+    if touches_live_rows(instance, rows):
+        return 0
+
+    batch = uuid.uuid4()
+    serialized = json.loads(serializers.serialize("json", rows))
+    references = nulled_references(collector)
+    ArchivedRow.objects.bulk_create(
+        [
+            ArchivedRow(
+                batch=batch,
+                position=position,
+                model_label=data["model"],
+                object_id=str(data["pk"]),
+                data=data,
+                nulled_references=references if position == 0 else [],
+                deleted_at=getattr(row, "deleted_at", None),
+            )
+            for position, (row, data) in enumerate(zip(rows, serialized))
+        ]
+    )
+    collector.delete()
+    return len(rows)
+
+
+def archive_model(model_label, before=None, chunk_size=500):
+    """
+    把 deleted_at 早於 before 的資料分批搬到 ArchivedRow，每批一個 transaction。
+    回傳 (搬走的主資料筆數, 包含關聯資料的總筆數)。
+    """
+    model = apps.get_model(model_label)
+    before = before or timezone.now() - retention()
+    queryset = model._base_manager.filter(deleted_at__lt=before).order_by("pk")
+
+    archived = rows = 0
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            break
+        with transaction.atomic():
+            for instance in chunk:
+                count = archive_instance(instance)
+                if count:
+                    archived += 1
+                    rows += count
+        last_pk = chunk[-1].pk
+    return archived, rows
+
+
+def parent_batches(objects_by_model):
+    """
+    找出外鍵指向、但目前不在主表的上層資料所屬的封存批次，
+    例如公司和底下的職缺是分開封存的，還原職缺前要先還原公司。
+    """
+    in_batch = {
+        (model._meta.label_lower, str(obj.pk))
+        for model, objects in objects_by_model
+        for obj in objects
+    }
+    wanted = defaultdict(set)
+    for model, objects in objects_by_model:
+        for field in model._meta.concrete_fields:
+            if not field.many_to_one and not field.one_to_one:
+                continue
+            parent = field.related_model
+            for obj in objects:
+                value = getattr(obj, field.attname)
+                key = (parent._meta.label_lower, str(value))
+                if value is not None and key not in in_batch:
+                    wanted[parent].add(value)
+
+    batches = set()
+    for parent, values in wanted.items():
+        label = parent._meta.label_lower
+        existing = parent._base_manager.filter(pk__in=values).values_list(
+            "pk", flat=True
+        )
+        missing = {str(value) for value in values} - {str(pk) for pk in existing}
+        archived = dict(
+            ArchivedRow.objects.filter(
+                model_label=label, object_id__in=missing
+            ).values_list("object_id", "batch")
+        )
+        lost = sorted(missing - archived.keys())
+        if lost:
+            names = "、".join(f"{label}#{object_id}" for object_id in lost)
+            raise RestoreError(f"找不到 {names}，無法還原")
+        batches.update(archived.values())
+    return batches
+
+
+def restore_batch(batch, restoring=None):
+    """
+    依刪除的相反順序寫回主表，保留原本的主鍵；寫回後仍是軟刪除狀態。
+    上層資料在別的批次時先還原那一批，哪裡都找不到就丟 RestoreError，不寫入任何資料。
+    刪除時被 SET_NULL 的外鍵會接回來。回傳寫回的列數（包含先還原的上層批次）。
+    """
+    restoring = restoring if restoring is not None else set()
+    restoring.add(batch)
+    archived_rows = list(ArchivedRow.objects.filter(batch=batch).order_by("-position"))
+    restored = len(archived_rows)
+    with transaction.atomic():
+        objects_by_model = [
+            (
+                apps.get_model(model_label),
+                [
+                    deserialized.object
+                    for deserialized in serializers.deserialize(
+                        "python", [row.data for row in group]
+                    )
+                ],
+            )
+            for model_label, group in groupby(
+                archived_rows, key=lambda row: row.model_label
+            )
+        ]
+        for parent_batch in parent_batches(objects_by_model) - restoring:
+            restored += restore_batch(parent_batch, restoring)
+
+        for model, objects in objects_by_model:
+            model._base_manager.bulk_create(objects)
+        for row in archived_rows:
+            for reference in row.nulled_references:
+                field = reference["field"]
+                apps.get_model(reference["model"])._base_manager.filter(
+                    pk__in=reference["pks"], **{f"{field}__isnull": True}
+                ).update(**{field: reference["value"]})
+        ArchivedRow.objects.filter(batch=batch).delete()
+    return restored
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.archive.archiver import ARCHIVED_MODELS, archive_model, retention
+
+
+class Command(BaseCommand):
+    help = "把軟刪除超過保留天數的資料搬到封存表"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, help="保留天數，預設為 ARCHIVE_RETENTION_DAYS"
+        )
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        keep = (
+            timedelta(days=options["days"])
+            if options["days"] is not None
+            else retention()
+        )
+        before = timezone.now() - keep
+
+        for model_label in ARCHIVED_MODELS:
+            archived, rows = archive_model(
+                model_label, before=before, chunk_size=options["chunk_size"]
+            )
+            self.stdout.write(
+                f"{model_label}：封存 {archived} 筆（含關聯資料共 {rows} 列）"
+            )
+        self.stdout.write(self.style.SUCCESS("完成"))
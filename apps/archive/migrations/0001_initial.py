@@ -0,0 +1,44 @@
+# Generated by Django 5.1.1 on 2026-10-18 14:20
+
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedRow",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("batch", models.UUIDField(db_index=True, default=uuid.uuid4)),
+                ("position", models.PositiveIntegerField()),
+                ("model_label", models.CharField(max_length=100)),
+                ("object_id", models.CharField(max_length=64)),
+                ("data", models.JSONField()),
+                ("deleted_at", models.DateTimeField(blank=True, null=True)),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["model_label", "object_id"],
+                        name="archive_arc_model_l_1966f8_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 17:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("archive", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivedrow",
+            name="nulled_references",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,28 @@
+import uuid
+
+from django.db import models
+
+
+class ArchivedRow(models.Model):
+    """
+    從主表搬出來的資料列。一筆軟刪除資料連同被連帶刪除的關聯資料屬於同一個 batch，
+    position 是刪除順序，還原時反過來依序寫回。
+    """
+
+    batch = models.UUIDField(default=uuid.uuid4, db_index=True)
+    position = models.PositiveIntegerField()
+    model_label = models.CharField(max_length=100)
+    object_id = models.CharField(max_length=64)
+    data = models.JSONField()
+    # 刪除時連帶被 SET_NULL 的外鍵，記在每批的第一列，還原時接回去
+    nulled_references = models.JSONField(default=list, blank=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["model_label", "object_id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label}#{self.object_id}"
@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.archive import archiver
+from apps.archive.models import ArchivedRow
+from apps.companies.models import Company
+from apps.jobs.models import Job
+from apps.jobs.testing import make_company, make_job
+from apps.users.models import User
+
+
+def archive_all():
+    before = timezone.now() + timedelta(days=1)
+    for model_label in archiver.ARCHIVED_MODELS:
+        archiver.archive_model(model_label, before=before)
+
+
+def batch_of(instance):
+    return ArchivedRow.objects.get(
+        model_label=instance._meta.label_lower, object_id=str(instance.pk)
+    ).batch
+
+
+class ArchiveRestoreTests(TestCase):
+    def setUp(self):
+        self.company = make_company("封存科技")
+        self.job = make_job(self.company)
+        self.job.tags.add("python")
+
+    def test_round_trip_keeps_the_row_soft_deleted(self):
+        self.job.mark_delete()
+        archive_all()
+        self.assertFalse(Job._base_manager.filter(pk=self.job.pk).exists())
+
+        archiver.restore_batch(batch_of(self.job))
+
+        job = Job._base_manager.get(pk=self.job.pk)
+        self.assertIsNotNone(job.deleted_at)
+        self.assertEqual(list(job.tags.names()), ["python"])
+        self.assertFalse(ArchivedRow.objects.exists())
+
+    def test_restoring_a_job_first_restores_its_company(self):
+        # 公司連帶軟刪除職缺，兩者分兩批封存
+        self.company.mark_delete(cascade=True)
+        archive_all()
+        self.assertNotEqual(batch_of(self.job), batch_of(self.company))
+        archived_rows = ArchivedRow.objects.count()
+
+        restored = archiver.restore_batch(batch_of(self.job))
+
+        self.assertTrue(Company._base_manager.filter(pk=self.company.pk).exists())
+        self.assertTrue(Job._base_manager.filter(pk=self.job.pk).exists())
+        self.assertEqual(restored, archived_rows)
+        self.assertFalse(ArchivedRow.objects.exists())
+
+    def test_missing_parent_is_refused(self):
+        self.job.mark_delete()
+        archive_all()
+        Company.objects.filter(pk=self.company.pk).delete()
+        batch = batch_of(self.job)
+
+        with self.assertRaisesMessage(
+            archiver.RestoreError, f"companies.company#{self.company.pk}"
+        ):
+            archiver.restore_batch(batch)
+        self.assertFalse(Job._base_manager.filter(pk=self.job.pk).exists())
+        self.assertTrue(ArchivedRow.objects.filter(batch=batch).exists())
+
+    def test_set_null_references_are_relinked(self):
+        duplicate = make_job(self.company, duplicate_of=self.job)
+        self.job.mark_delete()
+        archive_all()
+        duplicate.refresh_from_db()
+        self.assertIsNone(duplicate.duplicate_of_id)
+
+        archiver.restore_batch(batch_of(self.job))
+
+        duplicate.refresh_from_db()
+        self.assertEqual(duplicate.duplicate_of_id, self.job.pk)
+
+    def test_admin_reports_missing_parent(self):
+        self.job.mark_delete()
+        archive_all()
+        Company.objects.filter(pk=self.company.pk).delete()
+        self.client.force_login(
+            User.objects.create_superuser(username="admin", password="x")
+        )
+
+        response = self.client.post(
+            reverse("admin:archive_archivedrow_changelist"),
+            {
+                "action": "restore",
+                "_selected_action": [
+                    ArchivedRow.objects.filter(batch=batch_of(self.job))[0].pk
+                ],
+            },
+            follow=True,
+        )
+
+        self.assertContains(response, "還原失敗")
+        self.assertFalse(Job._base_manager.filter(pk=self.job.pk).exists())
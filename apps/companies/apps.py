@@ -7,3 +7,4 @@ class CompaniesConfig(AppConfig):
 
     def ready(self):
         import apps.companies.rules
+        import apps.companies.signals
@@ -0,0 +1,70 @@
+from django.apps import apps
+from django.db.models import Case, DecimalField, F, Value, When
+from django.db.models.functions import Cast, Round
+from django.db.models.lookups import GreaterThan
+
+from lib.models.counters import count_of, sum_of
+
+SCORE_FIELD = DecimalField(max_digits=2, decimal_places=1)
+
+
+def average_score(total, count):
+    """評分平均的 SQL 運算式，沒有評論時為 0。"""
+    average = Cast(total, DecimalField(max_digits=12, decimal_places=4)) / count
+    return Case(
+        When(GreaterThan(count, 0), then=Cast(Round(average, 1), SCORE_FIELD)),
+        default=Value(0),
+        output_field=SCORE_FIELD,
+    )
+
+
+def rate(company_id, count_delta, score_delta):
+    """
+    評論新增、改分、刪除時調整文章數與評分總和，平均分數在同一句 UPDATE 算出，
+    不必重新彙總公司所有評論。
+    """
+    if company_id is None or not (count_delta or score_delta):
+        return
+    post_count = F("post_count") + count_delta
+    score_sum = F("score_sum") + score_delta
+    apps.get_model("companies", "Company")._base_manager.filter(pk=company_id).update(
+        post_count=post_count,
+        score_sum=score_sum,
+        score=average_score(score_sum, post_count),
+    )
+
+
+def repair_scores():
+    """以未刪除的評論重算文章數、評分總和與平均。"""
+    Company = apps.get_model("companies", "Company")
+    Post = apps.get_model("posts", "Post")
+
+    Company._base_manager.update(
+        post_count=count_of(Post, "company", deleted_at=None),
+        score_sum=sum_of(Post, "company", "score", deleted_at=None),
+    )
+    # UPDATE 右側讀到的是舊值，平均要等總和寫入後再算
+    return Company._base_manager.update(
+        score=average_score(F("score_sum"), F("post_count"))
+    )
+
+
+def repair():
+    """重新計算所有計數欄位（評分另由 repair_scores 處理）。"""
+    Company = apps.get_model("companies", "Company")
+    CompanyFavorite = apps.get_model("companies", "CompanyFavorite")
+    Job = apps.get_model("jobs", "Job")
+    JobFavorite = apps.get_model("jobs", "JobFavorite")
+    Job_Resume = apps.get_model("jobs", "Job_Resume")
+    Post = apps.get_model("posts", "Post")
+
+    companies = Company._base_manager.update(
+        post_count=count_of(Post, "company", deleted_at=None),
+        live_job_count=count_of(Job, "company", deleted_at=None),
+        follower_count=count_of(CompanyFavorite, "company"),
+    )
+    jobs = Job._base_manager.update(
+        favorite_count=count_of(JobFavorite, "job"),
+        application_count=count_of(Job_Resume, "job"),
+    )
+    return companies, jobs
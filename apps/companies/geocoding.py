@@ -0,0 +1,142 @@
+import hashlib
+import logging
+import re
+import unicodedata
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from lib.utils.background import run_after_commit
+from lib.utils.geo import grid_cell
+from lib.utils.models.defined import fetch_coordinates
+
+logger = logging.getLogger(__name__)
+
+# 查到的地址保留 30 天，查不到的隔 1 天再試
+CACHE_TTL = timedelta(days=getattr(settings, "GEOCODE_CACHE_TTL_DAYS", 30))
+MISS_TTL = timedelta(days=getattr(settings, "GEOCODE_MISS_TTL_DAYS", 1))
+
+
+def normalize_address(address):
+    """全形轉半形、去掉多餘空白、英文轉小寫，「台北市 信義區」與「台北市信義區」視為同一個地址。"""
+    address = unicodedata.normalize("NFKC", address or "").lower()
+    return re.sub(r"\s+", "", address).replace("臺", "台")
+
+
+class GoogleGeocoder:
+    def __init__(self, timeout=5):
+        self.timeout = timeout
+
+    def __call__(self, address):
+        return fetch_coordinates(address, timeout=self.timeout)
+
+
+class FakeGeocoder:
+    """
+    不連網路的查詢，測試與本機開發用：同一個地址永遠回傳台灣範圍內的同一組座標，
+    known 可以指定特定地址的結果（None 表示查不到）。
+    """
+
+    def __init__(self, known=None):
+        self.known = {
+            normalize_address(key): value for key, value in (known or {}).items()
+        }
+        self.calls = []
+
+    def __call__(self, address):
+        self.calls.append(address)
+        normalized = normalize_address(address)
+        if normalized in self.known:
+            return self.known[normalized] or (None, None)
+        digest = hashlib.md5(normalized.encode()).digest()
+        lat = 22.0 + int.from_bytes(digest[:4], "big") / 2**32 * 3.3
+        lng = 120.0 + int.from_bytes(digest[4:8], "big") / 2**32 * 2.0
+        return round(lat, 6), round(lng, 6)
+
+
+def get_geocoder():
+    path = getattr(settings, "GEOCODER", None)
+    if path:
+        return import_string(path)()
+    return GoogleGeocoder(timeout=getattr(settings, "GEOCODE_TIMEOUT", 5))
+
+
+def _as_floats(cached):
+    if cached.latitude is None or cached.longitude is None:
+        return None, None
+    return float(cached.latitude), float(cached.longitude)
+
+
+def lookup(address, geocoder=None):
+    """
+    地址轉經緯度，先查快取表，過期或沒有才呼叫 geocoder，結果寫回快取。
+    geocoder 查不到回傳 (None, None)，失敗時回傳 None 或丟出例外。
+    查不到回傳 (None, None)；呼叫失敗且沒有舊結果時回傳 None，之後可以再試。
+    """
+    from .models import GeocodedAddress
+
+    normalized = normalize_address(address)
+    if not normalized:
+        return None, None
+
+    cached = GeocodedAddress.objects.filter(address=normalized).first()
+    if cached is not None:
+        ttl = CACHE_TTL if cached.latitude is not None else MISS_TTL
+        if timezone.now() - cached.fetched_at < ttl:
+            return _as_floats(cached)
+
+    geocoder = geocoder or get_geocoder()
+    try:
+        coordinates = geocoder(address)
+    except Exception:
+        logger.exception("地址查詢失敗：%s", address)
+        coordinates = None
+    if coordinates is None:
+        # 查詢失敗時沿用舊的結果，也不寫入快取，下次再試
+        if cached is not None:
+            return _as_floats(cached)
+        return None
+
+    lat, lng = coordinates
+    if lat is None or lng is None:
+        lat = lng = None
+    else:
+        lat, lng = round(lat, 6), round(lng, 6)
+    GeocodedAddress.objects.update_or_create(
+        address=normalized,
+        defaults={"latitude": lat, "longitude": lng, "fetched_at": timezone.now()},
+    )
+    return lat, lng
+
+
+def needs_geocoding(company):
+    return normalize_address(company.address) != company.geocoded_address
+
+
+def geocode_company(company_id, geocoder=None):
+    """查詢公司地址並寫回經緯度；用 UPDATE 只寫這幾個欄位，不會蓋掉其他欄位。"""
+    from .models import Company
+
+    company = Company._base_manager.filter(pk=company_id).only("address").first()
+    if company is None:
+        return False
+
+    coordinates = lookup(company.address, geocoder)
+    if coordinates is None:
+        return False
+
+    lat, lng = coordinates
+    Company._base_manager.filter(pk=company_id, address=company.address).update(
+        latitude=lat,
+        longitude=lng,
+        geo_cell=grid_cell(lat, lng),
+        geocoded_address=normalize_address(company.address),
+    )
+    return lat is not None
+
+
+def schedule(company_id):
+    """背景查詢；程序中途結束沒查到的，由 geocode_companies 指令補上。"""
+    run_after_commit(geocode_company, company_id)
@@ -0,0 +1,137 @@
+import io
+import logging
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+from lib.utils.background import run_after_commit
+
+logger = logging.getLogger(__name__)
+
+# 列表卡片與公司頁用的尺寸（最長邊，已含高解析度螢幕的兩倍）
+SIZES = {"card": 200, "detail": 600}
+# 依優先順序：瀏覽器幾乎都支援 WebP，JPEG 留給舊瀏覽器
+FORMATS = {"webp": ("WEBP", 80), "jpeg": ("JPEG", 85)}
+DEFAULT_LOGO = "imgs/logo.png"
+
+
+def media_url(name):
+    return f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{name}"
+
+
+def default_logo_url():
+    return f"{settings.STATIC_URL}{DEFAULT_LOGO}"
+
+
+def variant_name(source, size, ext):
+    """images/foo.png 的縮圖放在旁邊：images/variants/foo.card.webp"""
+    directory, filename = posixpath.split(source)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, "variants", f"{stem}.{size}.{ext}")
+
+
+def logo_url(company, size="card", ext=None):
+    """
+    公司圖片網址：有縮圖用縮圖（預設 WebP），還沒產生時用原圖，沒有上傳則用預設圖。
+    """
+    if not company.images:
+        return default_logo_url()
+    variants = company.image_variants or {}
+    if variants.get("source") == company.images.name:
+        names = variants.get(size, {})
+        for candidate in [ext] if ext else FORMATS:
+            if candidate in names:
+                return media_url(names[candidate])
+    return media_url(company.images.name)
+
+
+def mark_stale(company):
+    """換了新圖（即使檔名相同）時呼叫，保留舊縮圖的檔名，重建後才刪除。"""
+    company.image_variants = {**(company.image_variants or {}), "source": ""}
+
+
+def needs_variants(company):
+    source = company.images.name if company.images else None
+    return (company.image_variants or {}).get("source") != source
+
+
+def _render(image, size, ext):
+    image_format, quality = FORMATS[ext]
+    thumbnail = image.copy()
+    thumbnail.thumbnail((SIZES[size], SIZES[size]), Image.Resampling.LANCZOS)
+    if image_format == "JPEG" and thumbnail.mode != "RGB":
+        # JPEG 沒有透明度，透明的部分鋪白底
+        background = Image.new("RGB", thumbnail.size, (255, 255, 255))
+        rgba = thumbnail.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        thumbnail = background
+    elif thumbnail.mode not in ("RGB", "RGBA"):
+        thumbnail = thumbnail.convert("RGBA")
+
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, image_format, quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def _variant_names(variants):
+    return {name for size in SIZES for name in (variants or {}).get(size, {}).values()}
+
+
+def _delete_variants(variants, keep=()):
+    for name in _variant_names(variants) - set(keep):
+        try:
+            default_storage.delete(name)
+        except Exception:
+            logger.warning("刪除舊縮圖失敗：%s", name, exc_info=True)
+
+
+def build_variants(company_id):
+    """產生各尺寸、各格式的縮圖存回 storage，完成後記錄在 Company.image_variants。"""
+    from apps.jobs import cards
+
+    from .models import Company
+
+    company = Company._base_manager.filter(pk=company_id).first()
+    if company is None or not needs_variants(company):
+        return False
+
+    old_variants = company.image_variants
+    source = company.images.name if company.images else None
+    variants = {"source": source}
+    if source:
+        with default_storage.open(source, "rb") as file:
+            image = Image.open(file)
+            image.load()
+        image = ImageOps.exif_transpose(image)
+        for size in SIZES:
+            variants[size] = {}
+            for ext in FORMATS:
+                name = variant_name(source, size, ext)
+                if default_storage.exists(name):
+                    default_storage.delete(name)
+                variants[size][ext] = default_storage.save(
+                    name, ContentFile(_render(image, size, ext))
+                )
+
+    # 產生途中又換了圖片的話，交給下一次排程處理
+    current = Company._base_manager.filter(pk=company_id)
+    if source:
+        current = current.filter(images=source)
+    else:
+        current = current.filter(Q(images=None) | Q(images=""))
+    if not current.update(image_variants=variants):
+        return False
+
+    _delete_variants(old_variants, keep=_variant_names(variants))
+    company.image_variants = variants
+    cards.refresh_company(company)
+    return True
+
+
+def schedule(company_id):
+    """背景產生縮圖；程序中途結束沒做完的，由 build_logo_variants 指令補上。"""
+    run_after_commit(build_variants, company_id)
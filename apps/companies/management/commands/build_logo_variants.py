@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from apps.companies import logos
+from apps.companies.models import Company
+
+
+class Command(BaseCommand):
+    help = "產生公司圖片的 WebP / JPEG 縮圖（背景工作沒跑完或新增尺寸時使用）"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force", action="store_true", help="縮圖已是最新的公司也重新產生"
+        )
+
+    def handle(self, *args, **options):
+        built = failed = 0
+
+        for company in (
+            Company.objects.exclude(images=None)
+            .exclude(images="")
+            .only("id", "images", "image_variants")
+            .iterator(chunk_size=500)
+        ):
+            if options["force"]:
+                logos.mark_stale(company)
+                Company._base_manager.filter(pk=company.id).update(
+                    image_variants=company.image_variants
+                )
+            elif not logos.needs_variants(company):
+                continue
+            try:
+                if logos.build_variants(company.id):
+                    built += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"公司 {company.id} 縮圖產生失敗：{e}")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"完成，產生 {built} 間公司的縮圖，{failed} 間失敗")
+        )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from apps.companies import geocoding
+from apps.companies.models import Company
+
+
+class Command(BaseCommand):
+    help = "查詢地址有變動、尚未取得經緯度的公司（背景查詢沒跑完時補上）"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retry-missing",
+            action="store_true",
+            help="地址沒變但先前查不到經緯度的公司也重新查詢",
+        )
+
+    def handle(self, *args, **options):
+        retry_missing = options["retry_missing"]
+        found = missed = 0
+
+        for company in Company.objects.only(
+            "id", "address", "geocoded_address", "latitude"
+        ).iterator(chunk_size=1000):
+            stale = geocoding.needs_geocoding(company)
+            if not stale and not (retry_missing and company.latitude is None):
+                continue
+            if geocoding.geocode_company(company.id):
+                found += 1
+            else:
+                missed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"完成，{found} 間公司取得經緯度，{missed} 間查不到")
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.companies import counters
+
+
+class Command(BaseCommand):
+    help = "重新計算公司與職缺的計數欄位（文章數、評分、上架職缺數、追蹤數、收藏數、應徵數）"
+
+    def handle(self, *args, **options):
+        companies, jobs = counters.repair()
+        counters.repair_scores()
+        self.stdout.write(
+            self.style.SUCCESS(f"完成，更新 {companies} 間公司、{jobs} 筆職缺")
+        )
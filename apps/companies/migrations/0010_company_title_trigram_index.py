@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from lib.models.search_backend import trigram_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0009_company_images"),
+    ]
+
+    operations = [
+        trigram_index("companies_company", "title"),
+    ]
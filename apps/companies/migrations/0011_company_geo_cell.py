@@ -0,0 +1,36 @@
+import math
+
+from django.db import migrations, models
+
+
+def grid_cell(lat, lng):
+    # 與當時 lib.utils.geo.grid_cell 相同（0.1 度一格），migration 不引用 app 的程式
+    return f"{math.floor(float(lat) / 0.1)}:{math.floor(float(lng) / 0.1)}"
+
+
+def fill_geo_cell(apps, schema_editor):
+    Company = apps.get_model("companies", "Company")
+    companies = list(
+        Company.objects.exclude(latitude=None)
+        .exclude(longitude=None)
+        .only("id", "latitude", "longitude")
+    )
+    for company in companies:
+        company.geo_cell = grid_cell(company.latitude, company.longitude)
+    Company.objects.bulk_update(companies, ["geo_cell"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0010_company_title_trigram_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="company",
+            name="geo_cell",
+            field=models.CharField(blank=True, db_index=True, max_length=20, null=True),
+        ),
+        migrations.RunPython(fill_geo_cell, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.1 on 2026-10-18 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0011_company_geo_cell"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="company",
+            index=models.Index(
+                condition=models.Q(("deleted_at", None)),
+                fields=["-created_at", "-id"],
+                name="company_live_created_id_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-18 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0012_company_live_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="company",
+            name="post_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="company",
+            name="live_job_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="company",
+            name="follower_count",
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.1 on 2026-10-18 17:05
+
+from django.db import migrations, models
+from django.db.models.functions import Cast, Coalesce, Round
+
+
+def fill_scores(apps, schema_editor):
+    Company = apps.get_model("companies", "Company")
+    Post = apps.get_model("posts", "Post")
+
+    posts = Post._base_manager.filter(company=models.OuterRef("pk"), deleted_at=None)
+    posts = posts.order_by().values("company")
+    Company._base_manager.update(
+        post_count=Coalesce(
+            models.Subquery(posts.annotate(count=models.Count("*")).values("count")), 0
+        ),
+        score_sum=Coalesce(
+            models.Subquery(posts.annotate(total=models.Sum("score")).values("total")),
+            0,
+        ),
+    )
+    # UPDATE 右側讀到的是舊值，平均要等總和寫入後再算
+    score_field = models.DecimalField(max_digits=2, decimal_places=1)
+    average = Cast(
+        models.F("score_sum"), models.DecimalField(max_digits=12, decimal_places=4)
+    )
+    Company._base_manager.update(
+        score=models.Case(
+            models.When(
+                post_count__gt=0,
+                then=Cast(Round(average / models.F("post_count"), 1), score_field),
+            ),
+            default=models.Value(0),
+            output_field=score_field,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0013_company_counters"),
+        ("posts", "0010_post_comment_live_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="company",
+            name="score_sum",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_scores, migrations.RunPython.noop),
+    ]
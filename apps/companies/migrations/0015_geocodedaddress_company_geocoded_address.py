@@ -0,0 +1,80 @@
+# Generated by Django 5.1.1 on 2026-10-18 17:40
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def normalize_address(address):
+    # 與當時 apps.companies.geocoding.normalize_address 相同，migration 不引用 app 的程式
+    address = unicodedata.normalize("NFKC", address or "").lower()
+    return re.sub(r"\s+", "", address).replace("臺", "台")
+
+
+def seed_geocoded(apps, schema_editor):
+    Company = apps.get_model("companies", "Company")
+    GeocodedAddress = apps.get_model("companies", "GeocodedAddress")
+
+    # 已有經緯度的公司視為查過，同時放進快取
+    now = timezone.now()
+    seen = set()
+    for company in Company._base_manager.exclude(latitude=None).exclude(longitude=None):
+        normalized = normalize_address(company.address)
+        company.geocoded_address = normalized
+        company.save(update_fields=["geocoded_address"])
+        if normalized and normalized not in seen:
+            seen.add(normalized)
+            GeocodedAddress.objects.update_or_create(
+                address=normalized,
+                defaults={
+                    "latitude": company.latitude,
+                    "longitude": company.longitude,
+                    "fetched_at": now,
+                },
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0014_company_score_sum"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GeocodedAddress",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("address", models.CharField(max_length=300, unique=True)),
+                (
+                    "latitude",
+                    models.DecimalField(
+                        blank=True, decimal_places=6, max_digits=9, null=True
+                    ),
+                ),
+                (
+                    "longitude",
+                    models.DecimalField(
+                        blank=True, decimal_places=6, max_digits=9, null=True
+                    ),
+                ),
+                ("fetched_at", models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="company",
+            name="geocoded_address",
+            field=models.CharField(blank=True, default="", max_length=300),
+        ),
+        migrations.RunPython(seed_geocoded, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0015_geocodedaddress_company_geocoded_address"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="company",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -2,7 +2,7 @@ from django.conf import settings
 from django.db import models
 
 from apps.users.models import User
-from lib.models.soft_delete import SoftDeleteManager, SoftDeletetable
+from lib.models.soft_delete import SoftDeleteManager, SoftDeletetable, live_index
 
 
 class Company(SoftDeletetable, models.Model):
@@ -23,6 +23,10 @@ class Company(SoftDeletetable, models.Model):
     longitude = models.DecimalField(
         max_digits=9, decimal_places=6, null=True, blank=True
     )
+    # 經緯度所在的網格（lib.utils.geo.grid_cell），附近職缺搜尋用來找候選公司
+    geo_cell = models.CharField(max_length=20, null=True, blank=True, db_index=True)
+    # 目前經緯度是由哪個地址（正規化後）查到的，地址沒變就不必重新查詢
+    geocoded_address = models.CharField(max_length=300, blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(default=None, null=True)
@@ -33,15 +37,27 @@ class Company(SoftDeletetable, models.Model):
     )
     score = models.DecimalField(max_digits=2, decimal_places=1, null=True, blank=True)
     images = models.ImageField(upload_to="images/", null=True, blank=True)
+    # 背景產生的縮圖檔名（apps.companies.logos），source 為產生時的原圖
+    image_variants = models.JSONField(default=dict, blank=True)
+    # 由 signals 以 F() 維護的計數，repair_counters 可整批重算
+    # score 為 score_sum / post_count，只計未刪除的評論
+    post_count = models.IntegerField(default=0)
+    score_sum = models.IntegerField(default=0)
+    live_job_count = models.IntegerField(default=0)
+    follower_count = models.IntegerField(default=0)
 
     objects = SoftDeleteManager()
 
+    # 公司軟刪除時一併下架的關聯資料
+    soft_delete_cascade = ("jobs", "post")
+
     def is_favorited_by(self, user):
         return self.favorite.filter(id=user.id).exists()
 
     class Meta:
         indexes = [
             models.Index(fields=["deleted_at"]),
+            live_index("-created_at", "-id", name="company_live_created_id_idx"),
         ]
 
 
@@ -61,3 +77,19 @@ class CompanyFavorite(models.Model):
             "user",
             "company",
         ]
+
+
+class GeocodedAddress(models.Model):
+    """地址查詢結果的快取，查不到的地址也記下來（經緯度為 null），避免重複呼叫 API。"""
+
+    address = models.CharField(max_length=300, unique=True)
+    latitude = models.DecimalField(
+        max_digits=9, decimal_places=6, null=True, blank=True
+    )
+    longitude = models.DecimalField(
+        max_digits=9, decimal_places=6, null=True, blank=True
+    )
+    fetched_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.address
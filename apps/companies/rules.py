@@ -1,13 +1,23 @@
 import rules
 from django.shortcuts import get_object_or_404
 
+from lib.models import rule_cache
+
 from .models import Company
 
 
 @rules.predicate
-def can_edit_company(user, target_job_id):
-    company = get_object_or_404(Company, pk=target_job_id)
-    return user == company.user
+def can_edit_company(user, company_or_company_id):
+    if isinstance(company_or_company_id, Company):
+        company = company_or_company_id
+    else:
+        company = get_object_or_404(Company, pk=company_or_company_id)
+    return user.is_authenticated and user.id == company.user_id
+
+
+def editable_companies(user):
+    return Company.objects.filter(user=user)
 
 
 rules.add_rule("can_edit_company", can_edit_company)
+rule_cache.add_object_rule("can_edit_company", Company, editable_companies)
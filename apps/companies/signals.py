@@ -0,0 +1,58 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.companies import geocoding, logos
+from apps.companies.models import Company, CompanyFavorite
+from lib.models.counters import bump, bump_many
+from lib.utils.geo import grid_cell
+
+
+@receiver(pre_save, sender=Company)
+def company_geo_cell(sender, instance, **kwargs):
+    instance.geo_cell = grid_cell(instance.latitude, instance.longitude)
+
+
+@receiver(pre_save, sender=Company)
+def company_logo_replaced(sender, instance, **kwargs):
+    # 剛上傳、尚未存進 storage 的圖片；檔名可能和舊圖相同，不能只比對檔名
+    if instance.images and not instance.images._committed:
+        logos.mark_stale(instance)
+
+
+@receiver(post_save, sender=Company)
+def company_logo_variants(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and "images" not in update_fields:
+        return
+    if logos.needs_variants(instance):
+        logos.schedule(instance.pk)
+
+
+@receiver(post_save, sender=Company)
+def company_geocode(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and "address" not in update_fields:
+        return
+    if geocoding.needs_geocoding(instance):
+        geocoding.schedule(instance.pk)
+
+
+@receiver(post_save, sender=CompanyFavorite)
+def company_follower_count(sender, instance, created, **kwargs):
+    if created:
+        bump(Company, instance.company_id, "follower_count", 1)
+
+
+@receiver(post_delete, sender=CompanyFavorite)
+def company_follower_count_delete(sender, instance, **kwargs):
+    bump(Company, instance.company_id, "follower_count", -1)
+
+
+@receiver(m2m_changed, sender=Company.favorite.through)
+def company_follower_count_add(sender, instance, action, reverse, pk_set, **kwargs):
+    # company.favorite.add() 用 bulk_create 建立收藏，不會觸發 post_save；
+    # 移除則會逐筆觸發 post_delete，由上面處理
+    if action != "post_add" or not pk_set:
+        return
+    if reverse:
+        bump_many(Company, "follower_count", {pk: 1 for pk in pk_set})
+    else:
+        bump(Company, instance.pk, "follower_count", len(pk_set))
@@ -0,0 +1,11 @@
+from django import template
+
+from apps.companies import logos
+
+register = template.Library()
+
+
+@register.simple_tag
+def logo_url(company, size="card", ext=None):
+    """{% logo_url company "detail" %}：該尺寸最合適的縮圖網址，沒有縮圖時退回原圖或預設圖。"""
+    return logos.logo_url(company, size, ext)
@@ -0,0 +1,300 @@
+import base64
+import io
+from datetime import timedelta
+from unittest import mock
+from urllib.parse import urlencode
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from apps.companies import geocoding, logos
+from apps.companies.geocoding import FakeGeocoder
+from apps.companies.models import Company, CompanyFavorite, GeocodedAddress
+from apps.jobs.models import Job, JobCard
+from apps.jobs.testing import FailingGeocoder, make_company, make_job
+from apps.posts.models import Comment, Post
+from apps.users.models import User
+from lib.models.paginate import paginate_cursor
+
+
+class CompanyIndexTests(TestCase):
+    def index(self):
+        return self.client.get(reverse("companies:index"))
+
+    def assertConstantQueries(self, count):
+        make_company("第一家")
+        with self.assertNumQueries(count):
+            self.assertEqual(len(self.index().context["page_obj"]), 1)
+
+        for i in range(9):
+            company = make_company(f"公司{i}")
+            CompanyFavorite.objects.create(
+                company=company, user=User.objects.get(username="第一家-owner")
+            )
+        with self.assertNumQueries(count):
+            self.assertEqual(len(self.index().context["page_obj"]), 10)
+
+    def test_query_count_for_anonymous_visitor(self):
+        # 公司列表一句，收藏與擁有者狀態都在同一句
+        self.assertConstantQueries(1)
+
+    def test_query_count_for_logged_in_user(self):
+        self.client.force_login(User.objects.create_user(username="visitor"))
+        # session、使用者、公司列表，加上版型的通知數量、通知列表與 UserInfo
+        self.assertConstantQueries(6)
+
+
+@override_settings(BACKGROUND_ASYNC=False)
+class CompanyDeleteTests(TestCase):
+    def setUp(self):
+        self.company = make_company("刪除科技")
+        # 列表卡片在交易提交後才建立
+        with self.captureOnCommitCallbacks(execute=True):
+            make_job(self.company)
+            make_job(self.company, title="前端")
+        self.post = Post.objects.create(
+            title="評論", content="不錯", company=self.company, score=4
+        )
+        self.comment = Comment.objects.create(post=self.post, content="同意")
+
+    def delete(self):
+        return self.client.post(reverse("companies:delete", args=[self.company.id]))
+
+    def test_delete_cascades_to_jobs_posts_and_comments(self):
+        self.company.refresh_from_db()
+        self.assertEqual((self.company.live_job_count, self.company.post_count), (2, 1))
+        self.assertEqual(JobCard.objects.filter(company=self.company).count(), 2)
+        self.client.force_login(self.company.user)
+
+        self.assertRedirects(
+            self.delete(), reverse("companies:index"), fetch_redirect_response=False
+        )
+
+        company = Company._base_manager.get(pk=self.company.pk)
+        self.assertIsNotNone(company.deleted_at)
+        self.assertEqual((company.live_job_count, company.post_count), (0, 0))
+        self.assertFalse(Job.objects.filter(company=company).exists())
+        self.assertEqual(Job._base_manager.filter(company=company).count(), 2)
+        self.assertFalse(JobCard.objects.filter(company=company).exists())
+        self.assertFalse(Post.objects.filter(company=company).exists())
+        self.assertFalse(Comment.objects.filter(post=self.post).exists())
+        self.assertIsNotNone(Comment._base_manager.get(pk=self.comment.pk).deleted_at)
+
+    def test_only_the_owner_can_delete(self):
+        self.client.force_login(User.objects.create_user(username="其他人"))
+
+        self.assertTemplateUsed(self.delete(), "no_permission.html")
+        self.assertTrue(Company.objects.filter(pk=self.company.pk).exists())
+
+    def test_get_is_not_allowed(self):
+        self.client.force_login(self.company.user)
+
+        response = self.client.get(reverse("companies:delete", args=[self.company.id]))
+
+        self.assertEqual(response.status_code, 405)
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.companies = [make_company(f"游標{i}") for i in range(5)]
+        # 前三家同一時間建立，只能靠 id 分先後
+        tied = timezone.now()
+        Company.objects.filter(pk__in=[c.pk for c in cls.companies[:3]]).update(
+            created_at=tied
+        )
+        Company.objects.filter(pk=cls.companies[3].pk).update(
+            created_at=tied + timedelta(seconds=1)
+        )
+        Company.objects.filter(pk=cls.companies[4].pk).update(
+            created_at=tied + timedelta(seconds=2)
+        )
+
+    def page(self, query=""):
+        request = RequestFactory().get(f"/?{query}")
+        return paginate_cursor(request, Company.objects.all(), 2)
+
+    def titles(self, page):
+        return [company.title for company in page]
+
+    def test_next_and_previous_cursors_walk_through_ties(self):
+        first = self.page("q=x")
+        self.assertEqual(self.titles(first), ["游標4", "游標3"])
+        self.assertFalse(first.has_previous)
+        self.assertIsNone(first.previous_query)
+
+        second = self.page(first.next_query)
+        self.assertEqual(self.titles(second), ["游標2", "游標1"])
+        third = self.page(second.next_query)
+        self.assertEqual(self.titles(third), ["游標0"])
+        self.assertFalse(third.has_next)
+        self.assertEqual(third.first_query, "q=x")
+
+        back = self.page(third.previous_query)
+        self.assertEqual(self.titles(back), ["游標2", "游標1"])
+        self.assertEqual(back.next_query, second.next_query)
+        back = self.page(back.previous_query)
+        self.assertEqual(self.titles(back), ["游標4", "游標3"])
+        self.assertFalse(back.has_previous)
+        self.assertTrue(back.has_next)
+
+    def test_invalid_cursors_fall_back_to_the_first_page(self):
+        wrong_length = base64.urlsafe_b64encode(b'["2024-01-01T00:00:00"]').decode()
+        wrong_type = base64.urlsafe_b64encode(b'["yesterday", 1]').decode()
+        not_json = base64.urlsafe_b64encode(b"{{").decode()
+
+        for cursor in ["%%%", "abc", not_json, wrong_length, wrong_type]:
+            for name in ["cursor", "before"]:
+                with self.subTest(name=name, cursor=cursor):
+                    page = self.page(urlencode({name: cursor}))
+                    self.assertEqual(self.titles(page), ["游標4", "游標3"])
+                    self.assertFalse(page.has_previous)
+
+
+@override_settings(
+    GEOCODER="apps.companies.geocoding.FakeGeocoder", BACKGROUND_ASYNC=False
+)
+class GeocodingTests(TestCase):
+    def test_saving_an_address_geocodes_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            company = make_company("地址科技", address="台北市信義區信義路五段7號")
+            company.refresh_from_db()
+            self.assertIsNone(company.latitude)
+
+        self.assertTrue(callbacks)
+        company.refresh_from_db()
+        self.assertIsNotNone(company.latitude)
+        self.assertIsNotNone(company.geo_cell)
+        self.assertFalse(geocoding.needs_geocoding(company))
+
+    def test_unchanged_address_is_not_requeued(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            company = make_company("地址科技", address="台北市信義區")
+        company.refresh_from_db()
+
+        with mock.patch.object(geocoding, "schedule") as schedule:
+            company.title = "新名稱"
+            company.save()
+
+        schedule.assert_not_called()
+
+    def test_lookup_hits_the_cache_for_the_same_normalized_address(self):
+        geocoder = FakeGeocoder()
+        first = geocoding.lookup("台北市 信義區", geocoder)
+
+        self.assertEqual(geocoding.lookup("臺北市信義區", geocoder), first)
+        self.assertEqual(geocoder.calls, ["台北市 信義區"])
+
+    def test_not_found_is_cached_as_a_miss(self):
+        geocoder = FakeGeocoder({"查無此地": None})
+
+        self.assertEqual(geocoding.lookup("查無此地", geocoder), (None, None))
+        self.assertEqual(geocoding.lookup("查無此地", geocoder), (None, None))
+        self.assertEqual(len(geocoder.calls), 1)
+        self.assertIsNone(GeocodedAddress.objects.get(address="查無此地").latitude)
+
+    def test_failure_is_not_cached(self):
+        with self.assertLogs("apps.companies.geocoding", "ERROR"):
+            self.assertIsNone(geocoding.lookup("台北市", FailingGeocoder()))
+
+        self.assertFalse(GeocodedAddress.objects.exists())
+
+    def test_failure_keeps_the_expired_result(self):
+        geocoding.lookup("台北市", FakeGeocoder({"台北市": (25.03, 121.56)}))
+        GeocodedAddress.objects.update(
+            fetched_at=timezone.now() - geocoding.CACHE_TTL - timedelta(days=1)
+        )
+
+        with self.assertLogs("apps.companies.geocoding", "ERROR"):
+            coordinates = geocoding.lookup("台北市", FailingGeocoder())
+
+        self.assertEqual(coordinates, (25.03, 121.56))
+
+    def test_geocode_company_leaves_the_company_alone_on_failure(self):
+        company = make_company("地址科技", address="台北市")
+
+        with self.assertLogs("apps.companies.geocoding", "ERROR"):
+            self.assertFalse(geocoding.geocode_company(company.id, FailingGeocoder()))
+
+        company.refresh_from_db()
+        self.assertIsNone(company.latitude)
+        self.assertTrue(geocoding.needs_geocoding(company))
+
+
+def png_file(name, size=(1000, 500), mode="RGBA"):
+    buffer = io.BytesIO()
+    Image.new(mode, size, 0).save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    },
+    BACKGROUND_ASYNC=False,
+)
+class LogoVariantTests(TestCase):
+    def upload(self, company, file):
+        with self.captureOnCommitCallbacks(execute=True):
+            company.images = file
+            company.save()
+        company.refresh_from_db()
+        return company
+
+    def open_variant(self, company, size, ext):
+        with default_storage.open(company.image_variants[size][ext], "rb") as file:
+            image = Image.open(file)
+            image.load()
+        return image
+
+    def test_variants_are_rendered_for_every_size_and_format(self):
+        company = self.upload(make_company("圖片科技"), png_file("logo.png"))
+
+        self.assertEqual(company.image_variants["source"], company.images.name)
+        for size, longest in logos.SIZES.items():
+            for ext, (image_format, _) in logos.FORMATS.items():
+                image = self.open_variant(company, size, ext)
+                self.assertEqual(image.format, image_format)
+                self.assertEqual(max(image.size), longest)
+        # JPEG 沒有透明度，要轉成 RGB
+        self.assertEqual(self.open_variant(company, "card", "jpeg").mode, "RGB")
+        self.assertEqual(
+            logos.logo_url(company),
+            logos.media_url(company.image_variants["card"]["webp"]),
+        )
+
+    def test_palette_images_are_converted(self):
+        company = self.upload(
+            make_company("圖片科技"), png_file("logo.png", (300, 300), "P")
+        )
+
+        self.assertEqual(self.open_variant(company, "card", "webp").size, (200, 200))
+
+    def test_replacing_the_logo_removes_old_variants(self):
+        company = self.upload(make_company("圖片科技"), png_file("old.png"))
+        old_names = logos._variant_names(company.image_variants)
+
+        company = self.upload(company, png_file("new.png"))
+
+        self.assertTrue(
+            company.image_variants["card"]["webp"].endswith("new.card.webp")
+        )
+        for name in old_names:
+            self.assertFalse(default_storage.exists(name))
+
+    def test_logo_url_falls_back_to_the_original_and_default(self):
+        company = make_company("圖片科技")
+        self.assertEqual(logos.logo_url(company), logos.default_logo_url())
+
+        with self.captureOnCommitCallbacks():
+            company.images = png_file("logo.png")
+            company.save()
+
+        self.assertEqual(logos.logo_url(company), logos.media_url(company.images.name))
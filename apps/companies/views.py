@@ -4,27 +4,47 @@ import rules
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q, Value
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.views.decorators.http import require_http_methods, require_POST
 from taggit.models import Tag, TaggedItem
 
+from apps.jobs import importer
+from apps.jobs.cards import card_dict
 from apps.jobs.forms import JobForm
-from apps.jobs.models import Job, Job_Resume, JobFavorite
+from apps.jobs.models import Job, Job_Resume, JobCard
 from apps.posts.forms.posts_form import PostForm
 from apps.posts.models import Post
-from apps.resumes.models import Resume
-from apps.users.models import UserInfo
-from lib.models.paginate import paginate_queryset
+from apps.users.viewer_context import ViewerContext
+from lib.models.paginate import paginate_cursor, paginate_queryset
+from lib.models.rule_cache import get_cached_object_or_404
 from lib.models.rule_required import rule_required
+from lib.models.search_backend import get_search_backend
 from lib.utils.models.decorators import company_required
-from lib.utils.models.defined import LOCATION_CHOICES, fetch_coordinates
+from lib.utils.models.defined import LOCATION_CHOICES
 
 from .forms.companies_form import CompanyForm
+from .logos import logo_url
 from .models import Company, CompanyFavorite
 
 
+def annotate_directory(companies, user):
+    """公司列表每一列要的收藏狀態、是否為擁有者，在同一句 SQL 算完；文章數直接讀 post_count 欄位。"""
+    if not user.is_authenticated:
+        return companies.annotate(
+            favorited=Value(False),
+            is_owner=Value(False),
+        )
+    return companies.annotate(
+        favorited=Exists(
+            CompanyFavorite.objects.filter(company=OuterRef("pk"), user=user)
+        ),
+        is_owner=Q(user_id=user.id),
+    )
+
+
 def index(request):
     if request.method == "POST":
         company = get_object_or_404(Company, user=request.user)
@@ -33,38 +53,28 @@ def index(request):
         if form.is_valid():
             form.save()
 
-            coord_x, coord_y = fetch_coordinates(company.address)
-            if coord_x and coord_y:
-                company.latitude = coord_x
-                company.longitude = coord_y
-                company.save()
-
             messages.success(request, "新增成功")
             return redirect("companies:index")
-    companies = Company.objects.order_by("-id")
+    companies = annotate_directory(Company.objects.all(), request.user)
+    page_obj = paginate_cursor(request, companies, 10)
 
-    company_data = [
+    page_obj.object_list = [
         {
             "company": company,
-            "favorited": company.is_favorited_by(request.user),
-            "can_edit": rules.test_rule("can_edit_company", request.user, company.id),
-            "post_count": Post.objects.filter(company=company).count(),
-            "images": (
-                f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{company.images}"
-                if company.images
-                else f"{settings.STATIC_URL}imgs/logo.png"
-            ),
+            "favorited": company.favorited,
+            "can_edit": company.is_owner,
+            "post_count": company.post_count,
+            "images": logo_url(company),
         }
-        for company in companies
+        for company in page_obj
     ]
 
-    page_obj = paginate_queryset(request, company_data, 10)
     return render(request, "companies/index.html", {"page_obj": page_obj})
 
 
 @rule_required("can_edit_company")
 def edit(request, id):
-    company = get_object_or_404(Company, id=id)
+    company = get_cached_object_or_404(request, Company, id)
     form = CompanyForm(instance=company)
     return render(request, "companies/edit.html", {"form": form, "company": company})
 
@@ -77,12 +87,6 @@ def show(request, id):
         if form.is_valid():
             form.save()
 
-            coord_x, coord_y = fetch_coordinates(company.address)
-            if coord_x and coord_y:
-                company.latitude = coord_x
-                company.longitude = coord_y
-                company.save()
-
             messages.success(request, "更新成功")
             return redirect("companies:show", company.id)
         else:
@@ -110,14 +114,9 @@ def show(request, id):
         for post in posts
     ]
 
-    user_resume = []
-    if request.user.is_authenticated and 1 == request.user.type:
-        user_info = UserInfo.objects.get(user=request.user)
-        user_resume = Resume.objects.filter(userinfo=user_info).values_list(
-            "id", flat=True
-        )
     location_dict = dict(LOCATION_CHOICES)
     jobs = Job.objects.filter(company=company).order_by("-created_at")[:5]
+    viewer = ViewerContext.for_request(request).load_jobs(job.id for job in jobs)
     jobs_data = [
         {
             "id": job.id,
@@ -128,14 +127,8 @@ def show(request, id):
             "location": job.location,
             "salary": job.salary_range,
             "created_at": job.created_at,
-            "favorited": (
-                JobFavorite.objects.filter(job=job, user=request.user).exists()
-                if request.user.is_authenticated
-                else False
-            ),
-            "apply": Job_Resume.objects.filter(
-                job=job, resume__in=user_resume
-            ).exists(),
+            "favorited": viewer.job_favorited(job.id),
+            "apply": viewer.job_applied(job.id),
         }
         for job in jobs
     ]
@@ -161,12 +154,15 @@ def show(request, id):
     )
 
 
+@require_POST
 @login_required
-def favorite(request, id):
+@rule_required("can_edit_company")
+def delete(request, id):
     company = get_object_or_404(Company, pk=id)
-    if request.method == "POST":
-        company.mark_delete()
-        return redirect("companies:index")
+    # 公司底下的職缺、文章（含留言）一起軟刪除
+    company.mark_delete(cascade=True)
+    messages.success(request, "刪除成功")
+    return redirect("companies:index")
 
 
 @require_POST
@@ -189,13 +185,12 @@ def favorite_company(request, id):
 
 def post_index(request, id):
     company = get_object_or_404(Company, id=id)
-    posts = Post.objects.filter(company=company).order_by("-created_at")
+    page_obj = paginate_cursor(request, Post.objects.filter(company=company), 10)
 
-    posts_with_permissions = [
+    page_obj.object_list = [
         {"post": post, "can_edit": rules.test_rule("can_edit_post", request.user, post)}
-        for post in posts
+        for post in page_obj
     ]
-    page_obj = paginate_queryset(request, posts_with_permissions, 10)
 
     return render(
         request, "posts/index.html", {"page_obj": page_obj, "company": company}
@@ -223,30 +218,22 @@ def post_new(request, id):
 def jobs_index(request, id):
     company = get_object_or_404(Company, id=id)
 
-    jobs = Job.objects.filter(company=company).order_by("-id").select_related("company")
+    jobs = JobCard.objects.filter(company=company)
 
-    jobs_with_permissions = [
-        {
-            "id": job.id,
-            "title": job.title,
-            "description": job.description,
-            "type": job.type,
-            "created_at": job.created_at,
-            "get_location_display": job.get_location_display,
-            "salary_range": job.salary_range,
-            "company": job.company.title,
-            "company_id": job.company.id,
-            "can_edit": rules.test_rule("can_edit_job", request.user, job.id),
-            "favorited": (
-                JobFavorite.objects.filter(job=job, user=request.user).exists()
-                if request.user.is_authenticated
-                else False
-            ),
-        }
-        for job in jobs
+    page_obj = paginate_cursor(request, jobs, 10, ordering=("-created_at", "-job_id"))
+    viewer = ViewerContext.for_request(request).load_jobs(
+        card.job_id for card in page_obj
+    )
+    duplicates = dict(
+        Job.objects.filter(
+            id__in=[card.job_id for card in page_obj], duplicate_of__deleted_at=None
+        ).values_list("id", "duplicate_of_id")
+    )
+    page_obj.object_list = [
+        {**card_dict(card, viewer), "duplicate_of": duplicates.get(card.job_id)}
+        for card in page_obj
     ]
 
-    page_obj = paginate_queryset(request, jobs_with_permissions, 10)
     return render(
         request,
         "jobs/index.html",
@@ -260,18 +247,19 @@ def jobs_index(request, id):
 @login_required
 @rule_required("can_new_job")
 def jobs_new(request, id):
-    company = get_object_or_404(Company, id=id)
+    company = get_cached_object_or_404(request, Company, id)
     form = JobForm(request.POST)
     if form.is_valid():
-        job = form.save(commit=False)
-        job.company = company
-        job.save()
-
-        tags = request.POST.get("tags")
-        if tags:
-            tags = [tag["value"] for tag in json.loads(tags)]
-            job.tags.add(*tags)
+        with transaction.atomic():
+            job = form.save(commit=False)
+            job.company = company
             job.save()
+
+            tags = request.POST.get("tags")
+            if tags:
+                tags = [tag["value"] for tag in json.loads(tags)]
+                job.tags.add(*tags)
+                job.save()
         messages.success(request, "新增成功")
         return redirect(reverse("companies:jobs_index", args=[company.id]))
     else:
@@ -279,6 +267,33 @@ def jobs_new(request, id):
     return render(request, "jobs/new.html", {"form": form, "company": company})
 
 
+@require_POST
+@login_required
+@rule_required("can_new_job")
+def jobs_import(request, id):
+    company = get_cached_object_or_404(request, Company, id)
+    upload = request.FILES.get("file")
+    format = importer.detect_format(upload.name) if upload else None
+    if format is None:
+        messages.error(request, "請上傳 CSV 或 JSONL 檔案")
+        return redirect("companies:jobs_new", company.id)
+
+    if importer.runs_in_background(upload):
+        importer.schedule_import(company, request.user, upload, format)
+        messages.success(request, "檔案較大，已改在背景匯入，完成後會通知你結果")
+        return redirect("companies:jobs_index", company.id)
+
+    result = importer.import_jobs(company, importer.iter_rows(upload.file, format))
+
+    for line, errors in result.errors:
+        messages.error(request, f"第 {line} 行：{'；'.join(errors)}")
+    if result.file_error:
+        messages.error(request, result.summary())
+    else:
+        messages.success(request, result.summary())
+    return redirect("companies:jobs_index", company.id)
+
+
 @company_required
 def company_application(request):
     company = request.user.company
@@ -293,40 +308,32 @@ def company_application(request):
 
 def search_results(request):
     search_term = request.GET.get("q")
-    search_filter = Q()
+    search_backend = get_search_backend()
 
-    if search_term:
-        search_filter &= Q(title__icontains=search_term)
+    companies = search_backend.filter(Company.objects.all(), ["title"], search_term)
+    companies = search_backend.order_by_relevance(
+        companies, "title", search_term, "-created_at"
+    )
 
-    companies = Company.objects.filter(search_filter).distinct().order_by("-created_at")
-    count = companies.count()
+    companies = annotate_directory(companies, request.user)
+    page_obj = paginate_queryset(request, companies, 10)
+    count = page_obj.paginator.count
 
-    companies_data = [
+    page_obj.object_list = [
         {
             "id": company.id,
             "title": company.title,
             "description": company.description,
             "score": company.score,
-            "can_edit": rules.test_rule("can_edit_company", request.user, company.id),
-            "favorited": (
-                CompanyFavorite.objects.filter(
-                    company=company, user=request.user
-                ).exists()
-                if request.user.is_authenticated
-                else False
-            ),
-            "post_count": Post.objects.filter(company=company).count(),
-            "images": (
-                f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{company.images}"
-                if company.images
-                else f"{settings.STATIC_URL}imgs/logo.png"
-            ),
+            "can_edit": company.is_owner,
+            "favorited": company.favorited,
+            "post_count": company.post_count,
+            "images": logo_url(company),
         }
-        for company in companies
+        for company in page_obj
     ]
 
     current_page = request.GET.get("page", 1)
-    page_obj = paginate_queryset(request, companies_data, 10)
 
     return render(
         request,
@@ -0,0 +1,300 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.conf import settings
+
+from lib.utils.background import run_in_background
+
+from .facets import tag_facets
+
+# 短前綴對到的詞很多，排好的前幾名依前綴存起來，詞或數量變動時才重算
+TOP_PREFIX_LEN = 3
+TOP_K = 20
+
+
+class SuggestionIndex:
+    """
+    搜尋框自動完成：職缺名稱、公司名稱、標籤放在同一個排序陣列，
+    以 bisect 找前綴（中文字直接比對字首），再依上架中職缺數排序；
+    短前綴的前幾名另外存起來，不必每次掃過所有符合的詞。
+    過期時在背景重建後整份換上，期間照常使用舊資料。
+    """
+
+    def __init__(self, max_age=None):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._rebuilding = False
+        self._replay = None
+        self._invalid = False
+        self._reset()
+
+    def _reset(self):
+        self.entries = []
+        self.jobs = {}
+        self.title_counts = Counter()
+        self.company_job_counts = Counter()
+        self.company_titles = {}
+        self.companies_by_title = defaultdict(set)
+        self.top = {}
+        self.built_at = None
+
+    @property
+    def is_built(self):
+        return self.built_at is not None
+
+    def _stale(self):
+        if not self.is_built or self._invalid:
+            return True
+        return (
+            self.max_age is not None and time.monotonic() - self.built_at > self.max_age
+        )
+
+    def ensure_built(self):
+        if not self.is_built:
+            # 第一次沒有舊資料可用，只能在請求中建立
+            self.rebuild(if_missing=True)
+        elif self._stale():
+            self.rebuild_in_background()
+
+    def invalidate(self):
+        """大量寫入（例如匯入）後呼叫，下次使用時在背景重建。"""
+        with self._lock:
+            self._invalid = True
+
+    def rebuild_in_background(self):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        run_in_background(self.rebuild)
+
+    def rebuild(self, if_missing=False):
+        with self._build_lock:
+            # 等鎖的期間別的請求可能已經建好，不必再掃一次
+            if if_missing and self.is_built:
+                return
+            with self._lock:
+                self._rebuilding = True
+                self._replay = {}
+            try:
+                fresh = self._load()
+                with self._lock:
+                    self._swap(fresh)
+            finally:
+                with self._lock:
+                    self._rebuilding = False
+                    self._replay = None
+
+    def _load(self):
+        from apps.companies.models import Company
+
+        from .models import Job
+
+        fresh = SuggestionIndex(self.max_age)
+        for company_id, title in Company.objects.values_list("id", "title"):
+            fresh._add_company(company_id, title, building=True)
+        for job_id, title, company_id in Job.objects.values_list(
+            "id", "title", "company_id"
+        ).iterator(chunk_size=5000):
+            fresh._add_job(job_id, title, company_id, building=True)
+        # 標籤直接取 tag_facets 現有的，不在這裡再重建一次
+        for tag_name in tag_facets.tag_names():
+            fresh._add_entry("tag", tag_name, building=True)
+        # 整份重建時先收集，最後一次排序
+        fresh.entries = sorted(set(fresh.entries))
+        return fresh
+
+    def _swap(self, fresh):
+        self.entries = fresh.entries
+        self.jobs = fresh.jobs
+        self.title_counts = fresh.title_counts
+        self.company_job_counts = fresh.company_job_counts
+        self.company_titles = fresh.company_titles
+        self.companies_by_title = fresh.companies_by_title
+        self.top = {}
+        for (kind, pk), obj in self._replay.items():
+            if kind == "job":
+                self._remove_job(pk)
+                if obj is not None:
+                    self._update_job(obj)
+            else:
+                self._remove_company(pk)
+                if obj is not None:
+                    self._update_company(obj)
+        self.built_at = time.monotonic()
+        self._invalid = False
+
+    def _entry(self, kind, text):
+        return (text.lower(), kind, text)
+
+    def _add_entry(self, kind, text, building=False):
+        if not text:
+            return
+        entry = self._entry(kind, text)
+        if building:
+            self.entries.append(entry)
+            return
+        self._forget(text)
+        index = bisect_left(self.entries, entry)
+        if index == len(self.entries) or self.entries[index] != entry:
+            self.entries.insert(index, entry)
+
+    def _remove_entry(self, kind, text):
+        self._forget(text)
+        entry = self._entry(kind, text)
+        index = bisect_left(self.entries, entry)
+        if index < len(self.entries) and self.entries[index] == entry:
+            del self.entries[index]
+
+    def _forget(self, text):
+        # 這個詞的排名可能變了，清掉包含它的短前綴排行
+        key = (text or "").lower()
+        for length in range(1, min(len(key), TOP_PREFIX_LEN) + 1):
+            self.top.pop(key[:length], None)
+
+    def _count_company_job(self, company_id, delta):
+        self.company_job_counts[company_id] += delta
+        self._forget(self.company_titles.get(company_id))
+
+    def _add_company(self, company_id, title, building=False):
+        self.company_titles[company_id] = title
+        self.companies_by_title[title].add(company_id)
+        self._add_entry("company", title, building)
+
+    def _remove_company(self, company_id):
+        title = self.company_titles.pop(company_id, None)
+        if title is None:
+            return
+        self.companies_by_title[title].discard(company_id)
+        if not self.companies_by_title[title]:
+            del self.companies_by_title[title]
+            self._remove_entry("company", title)
+
+    def _add_job(self, job_id, title, company_id, building=False):
+        self.jobs[job_id] = (title, company_id)
+        self.title_counts[title] += 1
+        if building:
+            self.company_job_counts[company_id] += 1
+        else:
+            self._count_company_job(company_id, 1)
+        self._add_entry("job", title, building)
+
+    def _remove_job(self, job_id):
+        entry = self.jobs.pop(job_id, None)
+        if entry is None:
+            return
+        title, company_id = entry
+        self.title_counts[title] -= 1
+        self._count_company_job(company_id, -1)
+        self._forget(title)
+        if self.title_counts[title] <= 0:
+            del self.title_counts[title]
+            self._remove_entry("job", title)
+
+    def _update_job(self, job):
+        self._remove_job(job.id)
+        if job.deleted_at is None:
+            self._add_job(job.id, job.title, job.company_id)
+            _, tag_names = tag_facets.jobs.get(job.id, (None, ()))
+            for tag_name in tag_names:
+                self._add_entry("tag", tag_name)
+
+    def _update_company(self, company):
+        live = company.deleted_at is None
+        if live and self.company_titles.get(company.id) == company.title:
+            return
+        self._remove_company(company.id)
+        if live:
+            self._add_company(company.id, company.title)
+
+    def _record(self, kind, pk, obj):
+        # 重建期間的變動在新資料上再套用一次
+        if self._replay is not None:
+            self._replay[(kind, pk)] = obj
+
+    def update_job(self, job):
+        with self._lock:
+            self._record("job", job.id, job)
+            if self.is_built:
+                self._update_job(job)
+
+    def remove_job(self, job_id):
+        with self._lock:
+            self._record("job", job_id, None)
+            if self.is_built:
+                self._remove_job(job_id)
+
+    def remove_company(self, company_id):
+        with self._lock:
+            self._record("company", company_id, None)
+            if self.is_built:
+                self._remove_company(company_id)
+
+    def update_company(self, company):
+        with self._lock:
+            self._record("company", company.id, company)
+            if self.is_built:
+                self._update_company(company)
+
+    def tags_changed(self, tag_names):
+        """tag_facets 的職缺數變動時呼叫，清掉含這些標籤的短前綴排行。"""
+        with self._lock:
+            if tag_names is None:
+                self.top = {}
+                return
+            for tag_name in tag_names:
+                self._forget(tag_name)
+
+    def _weight(self, kind, text):
+        if kind == "job":
+            return self.title_counts.get(text, 0)
+        if kind == "tag":
+            return tag_facets.counts.get(text, 0)
+        return sum(
+            self.company_job_counts.get(company_id, 0)
+            for company_id in self.companies_by_title.get(text, ())
+        )
+
+    def _candidates(self, prefix):
+        index = bisect_left(self.entries, (prefix,))
+        while index < len(self.entries) and self.entries[index][0].startswith(prefix):
+            _, kind, text = self.entries[index]
+            weight = self._weight(kind, text)
+            if kind == "company" or weight > 0:
+                yield (-weight, len(text), text, kind)
+            index += 1
+
+    def _top(self, prefix, limit):
+        if len(prefix) > TOP_PREFIX_LEN or limit > TOP_K:
+            return heapq.nsmallest(limit, self._candidates(prefix))
+        # 詞或數量（包含 tag_facets 的標籤數）變動時會清掉對應的前綴
+        top = self.top.get(prefix)
+        if top is None:
+            top = self.top[prefix] = heapq.nsmallest(TOP_K, self._candidates(prefix))
+        return top[:limit]
+
+    def search(self, prefix, limit=8):
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        # 標籤的數量來自 tag_facets，先確定它建好，重建時才有標籤可用
+        tag_facets.ensure_built()
+        self.ensure_built()
+
+        with self._lock:
+            candidates = self._top(prefix, limit)
+
+        return [
+            {"text": text, "type": kind, "count": -weight}
+            for weight, _, text, kind in candidates
+        ]
+
+
+suggestion_index = SuggestionIndex(
+    max_age=getattr(settings, "JOB_SEARCH_INDEX_MAX_AGE", 300)
+)
+tag_facets.on_change(suggestion_index.tags_changed)
@@ -0,0 +1,86 @@
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+from apps.companies.logos import logo_url
+from lib.utils.models.defined import LOCATION_CHOICES
+
+EXCERPT_LENGTH = 120
+
+LOCATION_LABELS = dict(LOCATION_CHOICES)
+
+
+def excerpt(text):
+    text = " ".join(strip_tags(text or "").split())
+    return Truncator(text).chars(EXCERPT_LENGTH)
+
+
+def card_fields(job, company, tag_names):
+    """列表卡片需要的欄位，職缺、公司、標籤任一變動時重新計算。"""
+    return {
+        "title": job.title,
+        "excerpt": excerpt(job.description),
+        "type": job.type,
+        "location": job.location,
+        "location_label": LOCATION_LABELS.get(job.location, ""),
+        "salary_range": job.salary_range,
+        "tags": sorted(tag_names),
+        "company_id": company.id,
+        "company_title": company.title,
+        "company_image": logo_url(company),
+        "view_count": job.view_count,
+        "created_at": job.created_at,
+    }
+
+
+def refresh_job(job):
+    from .models import JobCard
+
+    if job.deleted_at is not None:
+        JobCard.objects.filter(job_id=job.id).delete()
+        return
+    # 有 prefetch_related("tags") 時不再查詢
+    tag_names = [tag.name for tag in job.tags.all()]
+    JobCard.objects.update_or_create(
+        job_id=job.id, defaults=card_fields(job, job.company, tag_names)
+    )
+
+
+def refresh_company(company):
+    from .models import JobCard
+
+    JobCard.objects.filter(company_id=company.id).update(
+        company_title=company.title,
+        company_image=logo_url(company),
+    )
+
+
+def load_cards(job_ids):
+    """依 job_ids 的順序取出卡片，找不到的（例如剛下架）略過。"""
+    from .models import JobCard
+
+    job_ids = list(job_ids)
+    cards = JobCard.objects.in_bulk(job_ids)
+    return [cards[job_id] for job_id in job_ids if job_id in cards]
+
+
+def card_dict(card, viewer):
+    return {
+        "id": card.job_id,
+        "title": card.title,
+        "description": card.excerpt,
+        "type": card.type,
+        "created_at": card.created_at,
+        "get_location_display": card.location_label,
+        "location_label": card.location_label,
+        "location": card.location,
+        "salary_range": card.salary_range,
+        "salary": card.salary_range,
+        "tags": card.tags,
+        "company": card.company_title,
+        "company_id": card.company_id,
+        "images": card.company_image,
+        "view_count": card.view_count,
+        "can_edit": viewer.can_edit_job(card.job_id),
+        "favorited": viewer.job_favorited(card.job_id),
+        "apply": viewer.job_applied(card.job_id),
+    }
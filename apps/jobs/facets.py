@@ -0,0 +1,208 @@
+import heapq
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from taggit.models import TaggedItem
+
+from lib.utils.background import run_in_background
+
+
+class TagFacetIndex:
+    """
+    搜尋側欄用的標籤統計：tag -> 上架中職缺數（全部與各地區），
+    以及 tag -> job id 集合，讓多標籤篩選直接在記憶體取交集。
+    過期時和 job_index 一樣在背景重建後整份換上，期間照常使用舊資料。
+    """
+
+    def __init__(self, max_age=None):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._rebuilding = False
+        self._replay = None
+        self._invalid = False
+        self._listeners = []
+        self._reset()
+
+    def _reset(self):
+        self.tag_jobs = defaultdict(set)
+        self.location_jobs = defaultdict(set)
+        self.counts = Counter()
+        self.location_counts = defaultdict(Counter)
+        self.jobs = {}
+        self.built_at = None
+
+    @property
+    def is_built(self):
+        return self.built_at is not None
+
+    def _stale(self):
+        if not self.is_built or self._invalid:
+            return True
+        return (
+            self.max_age is not None and time.monotonic() - self.built_at > self.max_age
+        )
+
+    def ensure_built(self):
+        if not self.is_built:
+            # 第一次沒有舊資料可用，只能在請求中建立
+            self.rebuild(if_missing=True)
+        elif self._stale():
+            self.rebuild_in_background()
+
+    def invalidate(self):
+        """大量寫入（例如匯入）後呼叫，下次使用時在背景重建。"""
+        with self._lock:
+            self._invalid = True
+
+    def on_change(self, listener):
+        """
+        登記 listener(tag_names)，標籤的職缺數變動時呼叫；整份重建後傳 None。
+        在鎖外呼叫，listener 可以再取用這個索引。
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, tag_names):
+        for listener in self._listeners:
+            listener(tag_names)
+
+    def rebuild_in_background(self):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        run_in_background(self.rebuild)
+
+    def rebuild(self, if_missing=False):
+        with self._build_lock:
+            # 等鎖的期間別的請求可能已經建好，不必再掃一次
+            if if_missing and self.is_built:
+                return
+            with self._lock:
+                self._rebuilding = True
+                self._replay = {}
+            try:
+                fresh = self._load()
+                with self._lock:
+                    self._swap(fresh)
+            finally:
+                with self._lock:
+                    self._rebuilding = False
+                    self._replay = None
+        self._notify(None)
+
+    def _load(self):
+        from .models import Job
+
+        fresh = TagFacetIndex(self.max_age)
+        locations = dict(Job.objects.values_list("id", "location"))
+        job_tags = defaultdict(set)
+        tagged_items = TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(Job)
+        ).values_list("object_id", "tag__name")
+        for object_id, tag_name in tagged_items.iterator(chunk_size=5000):
+            if object_id in locations:
+                job_tags[object_id].add(tag_name)
+
+        for job_id, location in locations.items():
+            fresh._add(job_id, location, job_tags.get(job_id, ()))
+        return fresh
+
+    def _swap(self, fresh):
+        self.tag_jobs = fresh.tag_jobs
+        self.location_jobs = fresh.location_jobs
+        self.counts = fresh.counts
+        self.location_counts = fresh.location_counts
+        self.jobs = fresh.jobs
+        # 重建期間的變動在新資料上再套用一次
+        for job_id, entry in self._replay.items():
+            self._remove(job_id)
+            if entry is not None:
+                self._add(job_id, *entry)
+        self.built_at = time.monotonic()
+        self._invalid = False
+
+    def _add(self, job_id, location, tag_names):
+        tag_names = frozenset(tag_names)
+        self.jobs[job_id] = (location, tag_names)
+        self.location_jobs[location].add(job_id)
+        for tag_name in tag_names:
+            self.tag_jobs[tag_name].add(job_id)
+            self.counts[tag_name] += 1
+            self.location_counts[location][tag_name] += 1
+
+    def _remove(self, job_id):
+        entry = self.jobs.pop(job_id, None)
+        if entry is None:
+            return frozenset()
+        location, tag_names = entry
+        self.location_jobs[location].discard(job_id)
+        for tag_name in tag_names:
+            self.tag_jobs[tag_name].discard(job_id)
+            self.counts[tag_name] -= 1
+            self.location_counts[location][tag_name] -= 1
+            if not self.tag_jobs[tag_name]:
+                del self.tag_jobs[tag_name]
+                del self.counts[tag_name]
+            if self.location_counts[location][tag_name] <= 0:
+                del self.location_counts[location][tag_name]
+        return tag_names
+
+    def update(self, job):
+        if not self.is_built and self._replay is None:
+            return
+        entry = None
+        if job.deleted_at is None:
+            entry = (job.location, frozenset(tag.name for tag in job.tags.all()))
+        with self._lock:
+            if self._replay is not None:
+                self._replay[job.id] = entry
+            if not self.is_built:
+                return
+            changed = self._remove(job.id)
+            if entry is not None:
+                self._add(job.id, *entry)
+                changed |= entry[1]
+        if changed:
+            self._notify(changed)
+
+    def remove(self, job_id):
+        with self._lock:
+            if self._replay is not None:
+                self._replay[job_id] = None
+            if not self.is_built:
+                return
+            changed = self._remove(job_id)
+        if changed:
+            self._notify(changed)
+
+    def tag_names(self):
+        with self._lock:
+            return list(self.counts)
+
+    def top_tags(self, location=None, limit=20):
+        self.ensure_built()
+        with self._lock:
+            counts = self.location_counts.get(location, {}) if location else self.counts
+            return heapq.nlargest(
+                limit, counts.items(), key=lambda item: (item[1], item[0])
+            )
+
+    def job_ids(self, tags, location=None):
+        """同時具有所有標籤（與地區）的職缺 id，依 id 由新到舊排序。"""
+        self.ensure_built()
+        with self._lock:
+            sets = [self.tag_jobs.get(tag_name, set()) for tag_name in tags]
+            if location:
+                sets.append(self.location_jobs.get(location, set()))
+            if not sets:
+                return []
+            sets.sort(key=len)
+            matched = set(sets[0]).intersection(*sets[1:])
+        return sorted(matched, reverse=True)
+
+
+tag_facets = TagFacetIndex(max_age=getattr(settings, "JOB_SEARCH_INDEX_MAX_AGE", 300))
@@ -0,0 +1,111 @@
+import hashlib
+from collections import Counter
+
+from django.db.models import Q
+
+from .search import tokenize
+
+BITS = 64
+BANDS = 4
+BAND_BITS = BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+# 漢明距離在這以內視為重複；小於 BANDS 才能保證至少有一段完全相同
+MAX_DISTANCE = 3
+
+FIELDS = ["simhash", *[f"simhash_band{i}" for i in range(BANDS)], "duplicate_of_id"]
+
+
+def token_hash(token):
+    return int.from_bytes(
+        hashlib.blake2b(token.encode(), digest_size=8).digest(), "big"
+    )
+
+
+def simhash(text):
+    weights = Counter(tokenize(text))
+    if not weights:
+        return None
+
+    vector = [0] * BITS
+    for token, weight in weights.items():
+        value = token_hash(token)
+        for bit in range(BITS):
+            vector[bit] += weight if value >> bit & 1 else -weight
+    return sum(1 << bit for bit in range(BITS) if vector[bit] > 0)
+
+
+def to_signed(value):
+    # BigIntegerField 是有號 64 位元
+    return value - (1 << BITS) if value >= 1 << (BITS - 1) else value
+
+
+def to_unsigned(value):
+    return value + (1 << BITS) if value < 0 else value
+
+
+def bands(value):
+    return [(value >> (band * BAND_BITS)) & BAND_MASK for band in range(BANDS)]
+
+
+def hamming(a, b):
+    return bin(to_unsigned(a) ^ to_unsigned(b)).count("1")
+
+
+def job_text(job, tag_names):
+    return " ".join([job.title, job.description, *sorted(tag_names)])
+
+
+def fingerprint_fields(job, tag_names):
+    value = simhash(job_text(job, tag_names))
+    if value is None:
+        return {"simhash": None, **{f"simhash_band{i}": None for i in range(BANDS)}}
+    return {
+        "simhash": to_signed(value),
+        **{f"simhash_band{i}": band for i, band in enumerate(bands(value))},
+    }
+
+
+def find_duplicate(job):
+    """
+    同一間公司、任一段 band 相同的職缺才是候選，不必兩兩比對；
+    再用完整指紋的漢明距離確認，回傳最早那一筆的原始職缺 id。
+    """
+    from .models import Job
+
+    if job.simhash is None or job.company_id is None:
+        return None
+
+    same_band = Q()
+    for i in range(BANDS):
+        same_band |= Q(**{f"simhash_band{i}": getattr(job, f"simhash_band{i}")})
+    candidates = (
+        Job.objects.filter(same_band, company_id=job.company_id)
+        .exclude(pk=job.pk)
+        .order_by("id")
+        .values_list("id", "simhash", "duplicate_of_id")
+    )
+    if job.pk:
+        # 只把較早的職缺當作原始職缺，避免兩筆互相指向對方
+        candidates = candidates.filter(id__lt=job.pk)
+    for candidate_id, candidate_hash, root_id in candidates:
+        if hamming(job.simhash, candidate_hash) <= MAX_DISTANCE:
+            # 候選本身也是重複的話指向它的原始職缺，不串成一條鏈
+            return root_id or candidate_id
+    return None
+
+
+def fingerprint(job, tag_names):
+    for field, value in fingerprint_fields(job, tag_names).items():
+        setattr(job, field, value)
+    job.duplicate_of_id = find_duplicate(job)
+
+
+def refresh(job, tag_names):
+    """重算後直接 UPDATE，不再觸發一次 save 的 signals；指紋沒變就不寫入。"""
+    from .models import Job
+
+    before = [getattr(job, field) for field in FIELDS]
+    fingerprint(job, tag_names)
+    fields = {field: getattr(job, field) for field in FIELDS}
+    if list(fields.values()) != before:
+        Job._base_manager.filter(pk=job.pk).update(**fields)
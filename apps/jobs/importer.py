@@ -0,0 +1,258 @@
+import csv
+import io
+import json
+import uuid
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.storage import default_storage
+from django.db import transaction
+from taggit.models import Tag, TaggedItem
+
+from apps.companies.models import Company
+from lib.models.counters import bump
+from lib.utils.background import run_after_commit
+
+from .autocomplete import suggestion_index
+from .cards import card_fields
+from .facets import tag_facets
+from .fingerprint import fingerprint_fields
+from .forms import JobForm
+from .salary import parse_salary
+from .search import job_index
+
+BATCH_SIZE = 500
+MAX_ERRORS = 20
+FORMATS = ("csv", "jsonl")
+# 超過這個大小的上傳檔改在背景匯入，完成後以通知回報結果
+SYNC_MAX_BYTES = 1024 * 1024
+
+
+class ImportFileError(Exception):
+    """整個檔案無法讀取（編碼或 CSV 格式錯誤），這次匯入全部取消。"""
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.file_error = None
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, errors))
+
+    def summary(self):
+        if self.file_error:
+            return f"匯入失敗，沒有新增任何職缺：{self.file_error}"
+        return f"匯入完成，新增 {self.created} 筆，失敗 {self.failed} 筆"
+
+
+def detect_format(filename):
+    extension = filename.rsplit(".", 1)[-1].lower()
+    return extension if extension in FORMATS else None
+
+
+def iter_rows(binary_file, format):
+    """
+    逐行讀取，不把整個檔案載入記憶體；回傳 (行號, dict)，無法解析的行 dict 為 None。
+    檔案不是 UTF-8 或 CSV 引號不成對時丟出 ImportFileError。
+    """
+    try:
+        yield from _iter_rows(binary_file, format)
+    except UnicodeDecodeError as error:
+        raise ImportFileError(
+            "檔案不是 UTF-8 編碼，請用 Excel 另存為「CSV UTF-8」後再上傳"
+        ) from error
+
+
+def _iter_rows(binary_file, format):
+    if format == "csv":
+        # strict：引號不成對時報錯，而不是把後面好幾行併成同一個欄位
+        reader = csv.DictReader(
+            io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline=""),
+            strict=True,
+        )
+        line_number = 1
+        try:
+            for row in reader:
+                line_number = reader.line_num
+                yield line_number, row
+        except csv.Error as error:
+            raise ImportFileError(
+                f"第 {line_number + 1} 行起 CSV 格式錯誤：{error}"
+            ) from error
+        return
+
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig")
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            row = None
+        if not isinstance(row, dict):
+            yield line_number, None
+            continue
+        tags = row.get("tags")
+        if isinstance(tags, list):
+            row["tags"] = ",".join(str(tag) for tag in tags)
+        yield line_number, row
+
+
+def save_tags(jobs, tag_names_by_job):
+    names = {name for tag_names in tag_names_by_job for name in tag_names}
+    tags = dict(Tag.objects.filter(name__in=names).values_list("name", "id"))
+
+    missing = [Tag(name=name) for name in names - tags.keys()]
+    for tag in missing:
+        tag.slug = tag.slugify(tag.name)
+    Tag.objects.bulk_create(missing, ignore_conflicts=True)
+    tags.update(Tag.objects.filter(name__in=names).values_list("name", "id"))
+    # slug 撞名的交給 taggit 自己處理（會自動加上流水號）
+    for name in names - tags.keys():
+        tags[name] = Tag.objects.get_or_create(name=name)[0].id
+
+    content_type = ContentType.objects.get_for_model(jobs[0])
+    TaggedItem.objects.bulk_create(
+        [
+            TaggedItem(tag_id=tags[name], content_type=content_type, object_id=job.id)
+            for job, tag_names in zip(jobs, tag_names_by_job)
+            for name in tag_names
+        ]
+    )
+
+
+def notify_followers(company, jobs):
+    from apps.users.models import Notification
+
+    Notification.objects.bulk_create(
+        [
+            Notification(
+                recipient_id=favorite.user_id,
+                sender_id=company.user_id,
+                job=jobs[0],
+                title="New Job",
+                message=f"{company.title} 發布了 {len(jobs)} 個新職缺：{jobs[0].title} 等",
+            )
+            for favorite in company.favorited_by_users.all()
+        ]
+    )
+
+
+def save_batch(company, jobs, tag_names_by_job):
+    from .models import Job, JobCard
+
+    Job.objects.bulk_create(jobs)
+    save_tags(jobs, tag_names_by_job)
+    JobCard.objects.bulk_create(
+        [
+            JobCard(job_id=job.id, **card_fields(job, company, tag_names))
+            for job, tag_names in zip(jobs, tag_names_by_job)
+        ]
+    )
+    notify_followers(company, jobs)
+    bump(Company, company.id, "live_job_count", len(jobs))
+
+
+def _invalidate_indexes():
+    job_index.invalidate()
+    tag_facets.invalidate()
+    suggestion_index.invalidate()
+
+
+def import_jobs(company, rows, batch_size=BATCH_SIZE):
+    """
+    以 JobForm 驗證每一列，通過的分批 bulk_create；bulk_create 不會觸發 signals，
+    所以薪資欄位、指紋、標籤、JobCard、追蹤者通知都在這裡整批處理，
+    記憶體中的搜尋索引則在提交後標記為需要重建。
+    推薦與相似職缺交給 build_recommendations / build_similar_jobs 定期重算。
+    整個匯入在同一個交易裡：檔案讀到一半出錯時前面的批次一起回滾，不會只匯入一部分。
+    """
+    result = ImportResult()
+    try:
+        with transaction.atomic():
+            _import_rows(company, rows, batch_size, result)
+    except ImportFileError as error:
+        result.created = 0
+        result.file_error = str(error)
+        return result
+
+    if result.created:
+        transaction.on_commit(_invalidate_indexes)
+    return result
+
+
+def _import_rows(company, rows, batch_size, result):
+    jobs = []
+    tag_names_by_job = []
+
+    for line_number, row in rows:
+        if row is None:
+            result.add_error(line_number, ["無法解析這一行"])
+            continue
+        form = JobForm(row)
+        if not form.is_valid():
+            result.add_error(
+                line_number,
+                [
+                    f"{field}: {', '.join(errors)}"
+                    for field, errors in form.errors.items()
+                ],
+            )
+            continue
+
+        job = form.save(commit=False)
+        job.company = company
+        job.salary_min, job.salary_max = parse_salary(job.salary_range)
+        tag_names = set(form.cleaned_data["tags"])
+        # 只算指紋，重複比對留給 fingerprint_jobs，避免每列多一次查詢
+        for field, value in fingerprint_fields(job, tag_names).items():
+            setattr(job, field, value)
+        jobs.append(job)
+        tag_names_by_job.append(tag_names)
+
+        if len(jobs) >= batch_size:
+            save_batch(company, jobs, tag_names_by_job)
+            result.created += len(jobs)
+            jobs, tag_names_by_job = [], []
+
+    if jobs:
+        save_batch(company, jobs, tag_names_by_job)
+        result.created += len(jobs)
+
+
+def runs_in_background(upload):
+    return upload.size > getattr(settings, "JOB_IMPORT_SYNC_MAX_BYTES", SYNC_MAX_BYTES)
+
+
+def schedule_import(company, user, upload, format):
+    """
+    大檔不在請求裡處理：先存到 storage，提交後在背景匯入，
+    結果以通知告訴上傳的人。程序中途結束時可以用 import_jobs 指令補跑。
+    """
+    path = default_storage.save(f"imports/{uuid.uuid4().hex}.{format}", upload)
+    run_after_commit(import_stored_file, company.id, user.id, path, format)
+
+
+def import_stored_file(company_id, user_id, path, format):
+    from apps.users.models import Notification
+
+    try:
+        company = Company.objects.get(id=company_id)
+        with default_storage.open(path, "rb") as file:
+            result = import_jobs(company, iter_rows(file, format))
+    finally:
+        default_storage.delete(path)
+
+    lines = [result.summary()]
+    lines += [f"第 {line} 行：{'；'.join(errors)}" for line, errors in result.errors]
+    Notification.objects.create(
+        recipient_id=user_id,
+        sender_id=company.user_id,
+        title="職缺匯入",
+        message="\n".join(lines),
+    )
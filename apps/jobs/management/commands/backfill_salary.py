@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from apps.jobs.models import Job
+from apps.jobs.salary import parse_salary
+
+
+class Command(BaseCommand):
+    help = "把既有職缺的 salary_range 解析成 salary_min / salary_max（依 id 分批）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        # 已下架的職缺也一併回填，分析或還原時才有數字可用
+        jobs = Job._base_manager.order_by("id")
+        last_id = 0
+        updated = 0
+
+        while True:
+            chunk = list(
+                jobs.filter(id__gt=last_id).only(
+                    "id", "salary_range", "salary_min", "salary_max"
+                )[:chunk_size]
+            )
+            if not chunk:
+                break
+
+            changed = []
+            for job in chunk:
+                salary_min, salary_max = parse_salary(job.salary_range)
+                if (job.salary_min, job.salary_max) != (salary_min, salary_max):
+                    job.salary_min, job.salary_max = salary_min, salary_max
+                    changed.append(job)
+
+            Job._base_manager.bulk_update(changed, ["salary_min", "salary_max"])
+            updated += len(changed)
+            last_id = chunk[-1].id
+            self.stdout.write(f"已處理到 id {last_id}，更新 {updated} 筆")
+
+        self.stdout.write(self.style.SUCCESS(f"完成，共更新 {updated} 筆"))
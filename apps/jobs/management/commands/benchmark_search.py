@@ -0,0 +1,137 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.companies.models import Company
+from apps.jobs.models import Job
+from lib.models.search_backend import get_search_backend
+from lib.utils.models.defined import LOCATION_CHOICES
+
+WORDS = [
+    "後端",
+    "前端",
+    "工程師",
+    "資深",
+    "Python",
+    "Django",
+    "React",
+    "DevOps",
+    "數據",
+    "分析師",
+]
+TRIGRAM_INDEXES = ["company_job_title_trgm_idx", "companies_company_title_trgm_idx"]
+
+
+class Command(BaseCommand):
+    help = (
+        "在交易內建立測試資料，量測職缺 / 公司關鍵字搜尋的查詢時間（結束後 rollback）"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--term", default="工程師")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        term = options["term"]
+        repeat = options["repeat"]
+
+        with transaction.atomic():
+            self.seed(rows)
+
+            if connection.vendor == "postgresql":
+                # 固定先量無索引、再量有索引，兩邊都先跑一次暖機，避免快取偏向其中一邊
+                with connection.cursor() as cursor:
+                    # 先檢查完剛寫入資料的外鍵，交易內才能刪除、建立索引
+                    cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+                    cursor.execute(
+                        "SELECT indexdef FROM pg_indexes WHERE indexname = ANY(%s)",
+                        [TRIGRAM_INDEXES],
+                    )
+                    definitions = [row[0] for row in cursor.fetchall()]
+                    for index_name in TRIGRAM_INDEXES:
+                        cursor.execute(f'DROP INDEX IF EXISTS "{index_name}"')
+                    self.analyze(cursor)
+                before = self.measure(term, repeat)
+                with connection.cursor() as cursor:
+                    for definition in definitions:
+                        cursor.execute(definition)
+                    self.analyze(cursor)
+                after = self.measure(term, repeat)
+            else:
+                before = None
+                after = self.measure(term, repeat)
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{connection.vendor}, {rows} 筆職缺, 關鍵字「{term}」")
+        for name, seconds in after.items():
+            line = f"  {name}: {seconds * 1000:.1f} ms"
+            if before:
+                line += f"（無 trigram 索引 {before[name] * 1000:.1f} ms）"
+            self.stdout.write(line)
+
+    def analyze(self, cursor):
+        cursor.execute("ANALYZE company_job")
+        cursor.execute("ANALYZE companies_company")
+
+    def seed(self, rows):
+        locations = [value for value, _ in LOCATION_CHOICES]
+        companies = Company.objects.bulk_create(
+            [
+                Company(
+                    title=f"{random.choice(WORDS)}科技 {i}",
+                    tel="",
+                    url="https://example.com",
+                    address="",
+                    description="",
+                    employees=0,
+                    name="",
+                    email="benchmark@example.com",
+                )
+                for i in range(max(rows // 10, 1))
+            ],
+            batch_size=2000,
+        )
+        Job.objects.bulk_create(
+            (
+                Job(
+                    company=random.choice(companies),
+                    title=" ".join(random.sample(WORDS, 3)),
+                    description="",
+                    location=random.choice(locations),
+                    type="全職",
+                    contact_info="",
+                    salary_range="",
+                    tenure=random.randint(0, 10),
+                )
+                for _ in range(rows)
+            ),
+            batch_size=2000,
+        )
+
+    def measure(self, term, repeat):
+        backend = get_search_backend()
+        queries = {
+            "jobs": lambda: backend.filter(
+                Job.objects.all(), ["title", "company__title"], term
+            ).order_by("-created_at"),
+            "companies": lambda: backend.filter(
+                Company.objects.all(), ["title"], term
+            ).order_by("-created_at"),
+        }
+
+        results = {}
+        for name, build in queries.items():
+            # 暖機：第一次執行的規劃與讀取磁碟成本不計入
+            build().count()
+            list(build()[:10])
+            started = time.perf_counter()
+            for _ in range(repeat):
+                build().count()
+                list(build()[:10])
+            results[name] = (time.perf_counter() - started) / repeat
+        return results
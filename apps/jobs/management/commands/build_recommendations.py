@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.jobs import recommend
+
+
+class Command(BaseCommand):
+    help = "重新計算所有求職者的推薦職缺（前 K 名）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = recommend.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"完成，共計算 {total} 位求職者"))
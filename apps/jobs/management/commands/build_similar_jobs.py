@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.jobs import similar
+
+
+class Command(BaseCommand):
+    help = "重建所有職缺的相似職缺清單"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--neighbors", type=int, default=similar.NEIGHBORS)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = similar.rebuild(
+            limit=options["neighbors"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"完成，共計算 {total} 筆職缺"))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from apps.jobs import fingerprint
+from apps.jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = "重新計算職缺的 SimHash 指紋並標記近似重複的職缺（依 id 由舊到新）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        last_id = 0
+        duplicates = 0
+
+        while True:
+            chunk = list(
+                Job.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .prefetch_related("tags")[:chunk_size]
+            )
+            if not chunk:
+                break
+
+            # 由舊到新處理，較早的職缺會先有指紋，後面的才找得到它
+            for job in chunk:
+                fingerprint.refresh(job, [tag.name for tag in job.tags.all()])
+                if job.duplicate_of_id:
+                    duplicates += 1
+            last_id = chunk[-1].id
+            self.stdout.write(f"已處理到 id {last_id}")
+
+        self.stdout.write(self.style.SUCCESS(f"完成，共 {duplicates} 筆疑似重複"))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.companies.models import Company
+from apps.jobs.importer import FORMATS, detect_format, import_jobs, iter_rows
+
+
+class Command(BaseCommand):
+    help = "從 CSV 或 JSONL 檔大量匯入職缺"
+
+    def add_arguments(self, parser):
+        parser.add_argument("company_id", type=int)
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=FORMATS)
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            company = Company.objects.get(id=options["company_id"])
+        except Company.DoesNotExist:
+            raise CommandError("找不到這間公司")
+
+        format = options["format"] or detect_format(options["path"])
+        if format is None:
+            raise CommandError("無法判斷檔案格式，請加上 --format")
+
+        with open(options["path"], "rb") as file:
+            result = import_jobs(
+                company, iter_rows(file, format), batch_size=options["batch_size"]
+            )
+
+        for line, errors in result.errors:
+            self.stderr.write(f"第 {line} 行：{'；'.join(errors)}")
+        if result.file_error:
+            raise CommandError(result.summary())
+        self.stdout.write(self.style.SUCCESS(result.summary()))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.jobs import cards
+from apps.jobs.models import Job, JobCard
+
+
+class Command(BaseCommand):
+    help = "重建職缺列表用的 JobCard"
+
+    def handle(self, *args, **options):
+        JobCard.objects.exclude(job__in=Job.objects.all()).delete()
+        total = 0
+        for job in (
+            Job.objects.select_related("company")
+            .prefetch_related("tags")
+            .iterator(chunk_size=1000)
+        ):
+            JobCard.objects.update_or_create(
+                job_id=job.id,
+                defaults=cards.card_fields(
+                    job, job.company, [tag.name for tag in job.tags.all()]
+                ),
+            )
+            total += 1
+        self.stdout.write(self.style.SUCCESS(f"完成，共重建 {total} 張卡片"))
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+from lib.models.search_backend import trigram_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0005_job_tags_alter_job_skills"),
+        (
+            "taggit",
+            "0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx",
+        ),
+    ]
+
+    operations = [
+        trigram_index("company_job", "title"),
+        trigram_index("taggit_tag", "name"),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.1 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0006_job_title_trigram_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="salary_min",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="salary_max",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["salary_min"], name="company_job_salary__38549f_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["salary_max"], name="company_job_salary__4dabf9_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.1 on 2026-10-18 11:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0008_jobrecommendation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SimilarJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similar_jobs",
+                        to="jobs.job",
+                    ),
+                ),
+                (
+                    "similar",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="jobs.job",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["job", "-score"], name="jobs_simila_job_id_141b66_idx"
+                    )
+                ],
+                "unique_together": {("job", "similar")},
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.1 on 2026-10-18 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0009_similarjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="view_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["view_count"], name="company_job_view_co_76f39c_idx"
+            ),
+        ),
+    ]
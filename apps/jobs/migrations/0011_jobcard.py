@@ -0,0 +1,112 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+
+def build_cards(apps, schema_editor):
+    # 只用這個時間點的 model 與欄位算卡片，之後 apps.jobs.cards 怎麼改都不影響
+    Job = apps.get_model("jobs", "Job")
+    JobCard = apps.get_model("jobs", "JobCard")
+    TaggedItem = apps.get_model("taggit", "TaggedItem")
+    ContentType = apps.get_model("contenttypes", "ContentType")
+
+    location_labels = dict(Job._meta.get_field("location").choices)
+    content_type = ContentType.objects.filter(app_label="jobs", model="job").first()
+    tags = {}
+    if content_type is not None:
+        for object_id, tag_name in TaggedItem.objects.filter(
+            content_type=content_type
+        ).values_list("object_id", "tag__name"):
+            tags.setdefault(object_id, []).append(tag_name)
+
+    def company_image(company):
+        if company.images:
+            return f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{company.images}"
+        return f"{settings.STATIC_URL}imgs/logo.png"
+
+    def card(job):
+        description = " ".join(strip_tags(job.description or "").split())
+        return JobCard(
+            job_id=job.id,
+            title=job.title,
+            excerpt=Truncator(description).chars(120),
+            type=job.type,
+            location=job.location,
+            location_label=location_labels.get(job.location, ""),
+            salary_range=job.salary_range,
+            tags=sorted(tags.get(job.id, ())),
+            company_id=job.company_id,
+            company_title=job.company.title,
+            company_image=company_image(job.company),
+            view_count=job.view_count,
+            created_at=job.created_at,
+        )
+
+    jobs = Job.objects.filter(deleted_at=None).select_related("company")
+    JobCard.objects.bulk_create(
+        (card(job) for job in jobs.iterator(chunk_size=1000)),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0011_company_geo_cell"),
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("jobs", "0010_job_view_count"),
+        (
+            "taggit",
+            "0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx",
+        ),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobCard",
+            fields=[
+                (
+                    "job",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="card",
+                        serialize=False,
+                        to="jobs.job",
+                    ),
+                ),
+                ("title", models.CharField(max_length=100)),
+                ("excerpt", models.CharField(max_length=200)),
+                ("type", models.CharField(max_length=100)),
+                ("location", models.CharField(max_length=100)),
+                ("location_label", models.CharField(max_length=100)),
+                ("salary_range", models.TextField()),
+                ("tags", models.JSONField(default=list)),
+                ("company_title", models.CharField(max_length=200)),
+                ("company_image", models.CharField(max_length=500)),
+                ("view_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField()),
+                (
+                    "company",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="companies.company",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-created_at", "-job"],
+                        name="jobs_jobcar_created_b2c972_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(build_cards, migrations.RunPython.noop),
+    ]
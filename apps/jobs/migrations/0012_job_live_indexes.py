@@ -0,0 +1,37 @@
+# Generated by Django 5.1.1 on 2026-10-18 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0011_jobcard"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                condition=models.Q(("deleted_at", None)),
+                fields=["company", "-created_at"],
+                name="job_live_company_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                condition=models.Q(("deleted_at", None)),
+                fields=["-created_at", "-id"],
+                name="job_live_created_id_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                condition=models.Q(("deleted_at", None)),
+                fields=["-view_count", "-created_at"],
+                name="job_live_views_created_idx",
+            ),
+        ),
+    ]
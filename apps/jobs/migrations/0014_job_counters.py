@@ -0,0 +1,59 @@
+# Generated by Django 5.1.1 on 2026-10-18 16:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, field, **filters):
+    counts = (
+        model._base_manager.filter(**{field: OuterRef("pk")}, **filters)
+        .order_by()
+        .values(field)
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def fill_counters(apps, schema_editor):
+    # 只用歷史版本的 model 計算，不依賴 apps.companies.counters
+    Company = apps.get_model("companies", "Company")
+    CompanyFavorite = apps.get_model("companies", "CompanyFavorite")
+    Job = apps.get_model("jobs", "Job")
+    JobFavorite = apps.get_model("jobs", "JobFavorite")
+    Job_Resume = apps.get_model("jobs", "Job_Resume")
+    Post = apps.get_model("posts", "Post")
+
+    Company._base_manager.update(
+        post_count=count_of(Post, "company", deleted_at=None),
+        live_job_count=count_of(Job, "company", deleted_at=None),
+        follower_count=count_of(CompanyFavorite, "company"),
+    )
+    Job._base_manager.update(
+        favorite_count=count_of(JobFavorite, "job"),
+        application_count=count_of(Job_Resume, "job"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0013_company_counters"),
+        ("jobs", "0013_job_simhash"),
+        ("posts", "0010_post_comment_live_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="favorite_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="application_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
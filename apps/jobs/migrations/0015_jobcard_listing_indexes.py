@@ -0,0 +1,26 @@
+# Generated by Django 5.1.1 on 2026-10-18 17:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0016_company_image_variants"),
+        ("jobs", "0014_job_counters"),
+    ]
+
+    operations = [
+        migrations.RenameIndex(
+            model_name="jobcard",
+            new_name="jobcard_created_job_idx",
+            old_name="jobs_jobcar_created_b2c972_idx",
+        ),
+        migrations.AddIndex(
+            model_name="jobcard",
+            index=models.Index(
+                fields=["company", "-created_at", "-job"],
+                name="jobcard_company_created_idx",
+            ),
+        ),
+    ]
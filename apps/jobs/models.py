@@ -4,7 +4,7 @@ from taggit.managers import TaggableManager
 
 from apps.companies.models import Company
 from apps.resumes.models import Resume
-from lib.models.soft_delete import SoftDeleteManager, SoftDeletetable
+from lib.models.soft_delete import SoftDeleteManager, SoftDeletetable, live_index
 from lib.utils.models.defined import LOCATION_CHOICES
 
 
@@ -17,10 +17,28 @@ class Job(SoftDeletetable, models.Model):
     skills = models.TextField(null=False, blank=False, default="")
     contact_info = models.TextField(null=False, blank=False)
     salary_range = models.TextField(null=False, blank=False)
+    salary_min = models.PositiveIntegerField(null=True, blank=True)
+    salary_max = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(null=True, default=None)
     tenure = models.PositiveIntegerField()
+    view_count = models.PositiveIntegerField(default=0)
+    favorite_count = models.IntegerField(default=0)
+    application_count = models.IntegerField(default=0)
+    # 標題＋描述＋標籤的 SimHash，切成四段 band 建索引找近似重複
+    simhash = models.BigIntegerField(null=True, blank=True)
+    simhash_band0 = models.IntegerField(null=True, blank=True)
+    simhash_band1 = models.IntegerField(null=True, blank=True)
+    simhash_band2 = models.IntegerField(null=True, blank=True)
+    simhash_band3 = models.IntegerField(null=True, blank=True)
+    duplicate_of = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="duplicates",
+    )
     favorite = models.ManyToManyField(settings.AUTH_USER_MODEL, through="JobFavorite")
     resumes = models.ManyToManyField(Resume, through="Job_Resume")
     tags = TaggableManager()
@@ -32,6 +50,18 @@ class Job(SoftDeletetable, models.Model):
 
     class Meta:
         db_table = "company_job"
+        indexes = [
+            models.Index(fields=["salary_min"]),
+            models.Index(fields=["salary_max"]),
+            models.Index(fields=["view_count"]),
+            models.Index(fields=["company", "simhash_band0"]),
+            models.Index(fields=["company", "simhash_band1"]),
+            models.Index(fields=["company", "simhash_band2"]),
+            models.Index(fields=["company", "simhash_band3"]),
+            live_index("company", "-created_at", name="job_live_company_created_idx"),
+            live_index("-created_at", "-id", name="job_live_created_id_idx"),
+            live_index("-view_count", "-created_at", name="job_live_views_created_idx"),
+        ]
 
 
 class JobFavorite(models.Model):
@@ -62,3 +92,71 @@ class Job_Resume(models.Model):
     created_at = models.DateField(auto_now_add=True)
     status = models.CharField(max_length=20, default="applied")
     read_at = models.DateTimeField(null=True, blank=True)
+
+
+class JobRecommendation(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="job_recommendations",
+    )
+    job = models.ForeignKey(
+        Job, on_delete=models.CASCADE, related_name="recommendations"
+    )
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = [
+            "user",
+            "job",
+        ]
+        indexes = [
+            models.Index(fields=["user", "-score"]),
+        ]
+
+
+class SimilarJob(models.Model):
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name="similar_jobs")
+    similar = models.ForeignKey(Job, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = [
+            "job",
+            "similar",
+        ]
+        indexes = [
+            models.Index(fields=["job", "-score"]),
+        ]
+
+
+class JobCard(models.Model):
+    """職缺列表用的反正規化資料，由 signals 維護，列表頁不必 join 也不必讀整段描述。"""
+
+    job = models.OneToOneField(
+        Job, on_delete=models.CASCADE, primary_key=True, related_name="card"
+    )
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="+")
+    title = models.CharField(max_length=100)
+    excerpt = models.CharField(max_length=200)
+    type = models.CharField(max_length=100)
+    location = models.CharField(max_length=100)
+    location_label = models.CharField(max_length=100)
+    salary_range = models.TextField()
+    tags = models.JSONField(default=list)
+    company_title = models.CharField(max_length=200)
+    company_image = models.CharField(max_length=500)
+    view_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        # 對應列表頁的 ("-created_at", "-job_id") 游標分頁，公司職缺頁再多一個 company 篩選
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-job"], name="jobcard_created_job_idx"
+            ),
+            models.Index(
+                fields=["company", "-created_at", "-job"],
+                name="jobcard_company_created_idx",
+            ),
+        ]
@@ -0,0 +1,191 @@
+import heapq
+import math
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count
+from taggit.models import TaggedItem
+
+from lib.utils.background import run_after_commit
+
+from .facets import tag_facets
+
+TOP_K = getattr(settings, "JOB_RECOMMENDATION_TOP_K", 20)
+# 新職缺上架時最多即時更新幾位求職者，其餘等 build_recommendations
+MAX_USERS = getattr(settings, "JOB_RECOMMENDATION_MAX_USERS", 2000)
+BATCH_SIZE = 500
+
+
+def idf(tag_name):
+    # 越少職缺用到的標籤權重越高；tag_facets 已經有各標籤的上架職缺數
+    return (
+        math.log((1 + len(tag_facets.jobs)) / (1 + tag_facets.counts.get(tag_name, 0)))
+        + 1
+    )
+
+
+def vector_norm(tag_names):
+    return math.sqrt(sum(idf(tag_name) ** 2 for tag_name in tag_names))
+
+
+def score(user_tags, user_norm, job_tags):
+    """以 IDF 加權的餘弦相似度：共同標籤的權重平方和，除以兩邊向量長度。"""
+    overlap = user_tags & job_tags
+    if not overlap:
+        return 0.0
+    return sum(idf(tag_name) ** 2 for tag_name in overlap) / (
+        user_norm * vector_norm(job_tags)
+    )
+
+
+def user_tag_names(user_info_ids):
+    from apps.users.models import UserInfo
+
+    tags = {user_info_id: set() for user_info_id in user_info_ids}
+    tagged_items = TaggedItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(UserInfo),
+        object_id__in=tags,
+    ).values_list("object_id", "tag__name")
+    for object_id, tag_name in tagged_items:
+        tags[object_id].add(tag_name)
+    return tags
+
+
+def top_jobs(user_tags, limit=TOP_K):
+    """從有共同標籤的職缺（tag_facets 的反向索引）中挑出分數最高的 limit 筆。"""
+    tag_facets.ensure_built()
+    if not user_tags:
+        return []
+    user_norm = vector_norm(user_tags)
+    candidates = set()
+    for tag_name in user_tags:
+        candidates |= tag_facets.tag_jobs.get(tag_name, set())
+
+    scored = (
+        (score(user_tags, user_norm, tag_facets.jobs[job_id][1]), job_id)
+        for job_id in candidates
+        if job_id in tag_facets.jobs
+    )
+    # 同分時新職缺（id 較大）優先
+    return heapq.nlargest(limit, scored)
+
+
+def refresh_user(user_info):
+    """重新計算一位求職者的推薦清單（標籤變動時呼叫）。"""
+    from .models import JobRecommendation
+
+    user_tags = user_tag_names([user_info.id])[user_info.id]
+    recommendations = [
+        JobRecommendation(user_id=user_info.user_id, job_id=job_id, score=job_score)
+        for job_score, job_id in top_jobs(user_tags)
+    ]
+    with transaction.atomic():
+        JobRecommendation.objects.filter(user_id=user_info.user_id).delete()
+        JobRecommendation.objects.bulk_create(recommendations)
+
+
+def add_job(job_id):
+    """
+    新職缺（或職缺標籤變動）時，只檢查共同標籤最多的前 MAX_USERS 位求職者，
+    分數擠得進他們的前 TOP_K 才寫入，並把被擠出去的刪掉。
+    其他求職者與 IDF 的偏移，交給定期執行的 build_recommendations 全部重算。
+    """
+    from apps.users.models import UserInfo
+
+    from .models import Job
+
+    remove_job(job_id)
+    job = Job._base_manager.filter(pk=job_id).only("deleted_at").first()
+    if job is None or job.deleted_at is not None:
+        return
+    job_tags = frozenset(job.tags.names())
+    if not job_tags:
+        return
+
+    tag_facets.ensure_built()
+    user_info_ids = list(
+        TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(UserInfo),
+            tag__name__in=job_tags,
+        )
+        .values("object_id")
+        .annotate(shared=Count("id"))
+        .order_by("-shared", "-object_id")
+        .values_list("object_id", flat=True)[:MAX_USERS]
+    )
+    for start in range(0, len(user_info_ids), BATCH_SIZE):
+        _add_job_for(job_id, job_tags, user_info_ids[start : start + BATCH_SIZE])
+
+
+def _add_job_for(job_id, job_tags, user_info_ids):
+    from apps.users.models import UserInfo
+
+    from .models import JobRecommendation
+
+    users = dict(
+        UserInfo.objects.filter(id__in=user_info_ids).values_list("id", "user_id")
+    )
+    tags_by_user = user_tag_names(users)
+
+    current = {}
+    for user_id, ranked_job_id, job_score in JobRecommendation.objects.filter(
+        user_id__in=users.values()
+    ).values_list("user_id", "job_id", "score"):
+        current.setdefault(user_id, []).append((job_score, ranked_job_id))
+
+    created = []
+    evicted = []
+    for user_info_id, user_id in users.items():
+        user_tags = tags_by_user[user_info_id]
+        job_score = score(user_tags, vector_norm(user_tags), job_tags)
+        if job_score <= 0:
+            continue
+        ranked = current.get(user_id, [])
+        if len(ranked) >= TOP_K:
+            lowest = min(ranked)
+            if lowest >= (job_score, job_id):
+                continue
+            evicted.append((user_id, lowest[1]))
+        created.append(
+            JobRecommendation(user_id=user_id, job_id=job_id, score=job_score)
+        )
+
+    with transaction.atomic():
+        for user_id, evicted_job_id in evicted:
+            JobRecommendation.objects.filter(
+                user_id=user_id, job_id=evicted_job_id
+            ).delete()
+        JobRecommendation.objects.bulk_create(created)
+
+
+def schedule(job_id):
+    """交易提交後在背景更新推薦清單，不拖慢儲存職缺的請求。"""
+    run_after_commit(add_job, job_id)
+
+
+def remove_job(job_id):
+    from .models import JobRecommendation
+
+    JobRecommendation.objects.filter(job_id=job_id).delete()
+
+
+def rebuild(batch_size=1000):
+    from apps.users.models import UserInfo
+
+    from .models import JobRecommendation
+
+    tag_facets.rebuild()
+    user_info_ids = list(UserInfo.objects.values_list("id", "user_id"))
+    for start in range(0, len(user_info_ids), batch_size):
+        batch = dict(user_info_ids[start : start + batch_size])
+        tags_by_user = user_tag_names(batch)
+        recommendations = [
+            JobRecommendation(user_id=user_id, job_id=job_id, score=job_score)
+            for user_info_id, user_id in batch.items()
+            for job_score, job_id in top_jobs(tags_by_user[user_info_id])
+        ]
+        with transaction.atomic():
+            JobRecommendation.objects.filter(user_id__in=batch.values()).delete()
+            JobRecommendation.objects.bulk_create(recommendations, batch_size=1000)
+    return len(user_info_ids)
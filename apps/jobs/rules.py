@@ -2,21 +2,42 @@ import rules
 from django.shortcuts import get_object_or_404
 
 from apps.companies.models import Company
+from lib.models import rule_cache
 
 from .models import Job
 
 
 @rules.predicate
-def can_edit_job(user, target_id):
-    job = get_object_or_404(Job, pk=target_id)
-    return user == job.company.user
+def can_edit_job(user, job_or_job_id):
+    if not user.is_authenticated:
+        return False
+    if not isinstance(job_or_job_id, Job):
+        owner_id = get_object_or_404(
+            Job.objects.values_list("company__user_id", flat=True), pk=job_or_job_id
+        )
+        return user.id == owner_id
+    job = job_or_job_id
+    if Job.company.is_cached(job):
+        return user.id == job.company.user_id
+    # 沒有預先載入公司時只查擁有者，不把整筆公司讀進來
+    return Company._base_manager.filter(pk=job.company_id, user_id=user.id).exists()
 
 
 @rules.predicate
 def can_new_job(user, target_id):
     company = get_object_or_404(Company, pk=target_id)
-    return user == company.user
+    return user.is_authenticated and user.id == company.user_id
+
+
+def editable_jobs(user):
+    return Job.objects.select_related("company").filter(company__user=user)
+
+
+def job_creatable_companies(user):
+    return Company.objects.filter(user=user)
 
 
 rules.add_rule("can_edit_job", can_edit_job)
 rules.add_rule("can_new_job", can_new_job)
+rule_cache.add_object_rule("can_edit_job", Job, editable_jobs)
+rule_cache.add_object_rule("can_new_job", Company, job_creatable_companies)
@@ -0,0 +1,60 @@
+import re
+
+# 「4萬」「40k」「40,000」這類數字，後面可接單位；「2萬8」是 2.8 萬
+AMOUNT_RE = re.compile(
+    r"(\d+(?:\.\d+)?)\s*(萬|万|k|K|千)?(?:(?<=[萬万])(\d)(?![\d.]))?"
+)
+RANGE_SEPARATORS = re.compile(r"\s*(?:-|~|～|－|—|至|到)\s*")
+UNITS = {"萬": 10_000, "万": 10_000, "k": 1_000, "K": 1_000, "千": 1_000}
+# 時薪、日薪換算成月薪要假設工時，不如當作無法判讀
+NOT_MONTHLY_RE = re.compile(
+    r"時薪|日薪|每小時|每日|/\s*(?:小時|時|日|天|hr|hour|day)|per\s*(?:hour|day)",
+    re.IGNORECASE,
+)
+# 超過這個金額多半是打錯字，也放不進 PositiveIntegerField
+MAX_MONTHLY_SALARY = 10_000_000
+# 「2024年」「2024/10」這類年份、日期不是金額，先拿掉
+YEAR_RE = re.compile(
+    r"(?<!\d)(?:19|20)\d{2}\s*(?:年|[/.-]\d{1,2}(?:[/.-]\d{1,2})?(?!\d))"
+)
+# 「1e9」這種科學記號只會被讀成 1，整筆當作無法判讀
+SCIENTIFIC_RE = re.compile(r"\d[eE][+-]?\d")
+
+
+def parse_salary(text):
+    """
+    把薪資文字轉成 (月薪下限, 月薪上限)，無法判讀（例如「面議」）回傳 (None, None)。
+    支援 "40000"、"40,000"、"40000-60000"、"4萬~6萬"、"4-6萬"、"40k-60k"、"年薪 120 萬"；
+    時薪、日薪、科學記號與超過 MAX_MONTHLY_SALARY 的金額視為無法判讀，年份與日期略過。
+    """
+    if not text or NOT_MONTHLY_RE.search(text) or SCIENTIFIC_RE.search(text):
+        return None, None
+
+    text = text.replace(",", "").replace("，", "").strip()
+    annual = "年薪" in text
+    text = YEAR_RE.sub(" ", text)
+
+    parts = RANGE_SEPARATORS.split(text, maxsplit=1)
+    amounts = []
+    for part in parts:
+        match = AMOUNT_RE.search(part)
+        if match:
+            number, unit, tenths = match.groups()
+            number = float(number) + (int(tenths) / 10 if tenths else 0)
+            amounts.append([number, unit])
+    if not amounts:
+        return None, None
+
+    # 「4-6萬」：只有最後一個數字帶單位時，套用到前面的數字
+    unit = amounts[-1][1]
+    for amount in amounts:
+        if amount[1] is None:
+            amount[1] = unit
+
+    values = [int(number * UNITS.get(unit, 1)) for number, unit in amounts]
+    if annual:
+        values = [value // 12 for value in values]
+    if max(values) > MAX_MONTHLY_SALARY:
+        return None, None
+
+    return min(values), max(values)
@@ -0,0 +1,294 @@
+import math
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+
+from lib.utils.background import run_in_background
+from lib.utils.models.defined import LOCATION_CHOICES
+
+# 欄位權重：標題 > 標籤 / 公司 > 地點 > 描述
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "tags": 2.0,
+    "company": 2.0,
+    "location": 1.0,
+    "description": 0.5,
+}
+
+CJK_RE = re.compile(r"[㐀-䶿一-鿿豈-﫿]+")
+WORD_RE = re.compile(r"[a-z0-9+#]+(?:[._-][a-z0-9+#]+)*")
+
+LOCATION_LABELS = dict(LOCATION_CHOICES)
+
+
+def tokenize(text):
+    """中文切成相鄰兩字（bigram），英數字切成小寫單字。"""
+    if not text:
+        return []
+
+    text = text.lower()
+    tokens = WORD_RE.findall(CJK_RE.sub(" ", text))
+    for run in CJK_RE.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def is_cjk(token):
+    return bool(CJK_RE.match(token))
+
+
+def _insert(sorted_list, item):
+    index = bisect_left(sorted_list, item)
+    if index == len(sorted_list) or sorted_list[index] != item:
+        sorted_list.insert(index, item)
+
+
+def _prefixed(sorted_list, prefix):
+    index = bisect_left(sorted_list, prefix)
+    while index < len(sorted_list) and sorted_list[index].startswith(prefix):
+        yield sorted_list[index]
+        index += 1
+
+
+class JobSearchIndex:
+    """
+    職缺全文索引。過期時在背景重建，建好才整份換上，期間照常使用舊索引；
+    重建期間的 update / remove 先記下來，換上新索引後再套用一次。
+    """
+
+    def __init__(self, enabled=True, max_age=None):
+        self.enabled = enabled
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._rebuilding = False
+        self._replay = None
+        self._invalid = False
+        self._reset()
+
+    def _reset(self):
+        self.postings = defaultdict(dict)
+        self.vocabulary = []
+        # 中文 bigram 反轉後排序，單一中文字才能找到以它結尾的詞
+        self.cjk_suffixes = []
+        self.docs = {}
+        self.company_titles = {}
+        self.built_at = None
+
+    @property
+    def is_built(self):
+        return self.built_at is not None
+
+    def _stale(self):
+        if not self.is_built or self._invalid:
+            return True
+        return (
+            self.max_age is not None and time.monotonic() - self.built_at > self.max_age
+        )
+
+    def ensure_built(self):
+        if not self.is_built:
+            # 第一次沒有舊索引可用，只能在請求中建立
+            self.rebuild()
+        elif self._stale():
+            self.rebuild_in_background()
+
+    def invalidate(self):
+        """大量寫入（例如匯入）後呼叫，下次使用時在背景重建。"""
+        with self._lock:
+            self._invalid = True
+
+    def rebuild_in_background(self):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        run_in_background(self.rebuild)
+
+    def rebuild(self):
+        with self._build_lock:
+            with self._lock:
+                self._rebuilding = True
+                self._replay = {}
+            try:
+                fresh = self._load()
+                with self._lock:
+                    self._swap(fresh)
+            finally:
+                with self._lock:
+                    self._rebuilding = False
+                    self._replay = None
+
+    def _load(self):
+        from .models import Job
+
+        fresh = JobSearchIndex(self.enabled, self.max_age)
+        jobs = (
+            Job.objects.select_related("company")
+            .prefetch_related("tags")
+            .order_by("id")
+        )
+        for job in jobs.iterator(chunk_size=2000):
+            fresh._add(job, building=True)
+        fresh.vocabulary = sorted(fresh.postings)
+        fresh.cjk_suffixes = sorted(
+            token[::-1] for token in fresh.postings if is_cjk(token) and len(token) > 1
+        )
+        return fresh
+
+    def _swap(self, fresh):
+        self.postings = fresh.postings
+        self.vocabulary = fresh.vocabulary
+        self.cjk_suffixes = fresh.cjk_suffixes
+        self.docs = fresh.docs
+        self.company_titles = fresh.company_titles
+        for job_id, job in self._replay.items():
+            self._remove(job_id)
+            if job is not None and job.deleted_at is None:
+                self._add(job)
+        self.built_at = time.monotonic()
+        self._invalid = False
+
+    def _document_terms(self, job, tag_names):
+        fields = {
+            "title": job.title,
+            "company": job.company.title if job.company_id else "",
+            "location": f"{job.location} {LOCATION_LABELS.get(job.location, '')}",
+            "description": job.description,
+            "tags": " ".join(tag_names),
+        }
+        terms = defaultdict(float)
+        for field, text in fields.items():
+            for token in tokenize(text):
+                terms[token] += FIELD_WEIGHTS[field]
+        return terms
+
+    def _add(self, job, building=False):
+        tag_names = [tag.name for tag in job.tags.all()]
+        terms = self._document_terms(job, tag_names)
+        for token, weight in terms.items():
+            posting = self.postings[token]
+            # 整份重建時最後才一次排序詞表
+            if not posting and not building:
+                self._add_term(token)
+            posting[job.id] = weight
+
+        self.docs[job.id] = {
+            "terms": tuple(terms),
+            "location": job.location,
+            "tags": frozenset(tag_names),
+            "created_at": job.created_at.timestamp() if job.created_at else 0,
+            "salary_min": job.salary_min,
+            "salary_max": job.salary_max,
+        }
+        if job.company_id:
+            self.company_titles[job.company_id] = job.company.title
+
+    def _add_term(self, token):
+        _insert(self.vocabulary, token)
+        if is_cjk(token) and len(token) > 1:
+            _insert(self.cjk_suffixes, token[::-1])
+
+    def _remove(self, job_id):
+        doc = self.docs.pop(job_id, None)
+        if doc is None:
+            return
+        for token in doc["terms"]:
+            posting = self.postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(job_id, None)
+            if not posting:
+                del self.postings[token]
+
+    def update(self, job):
+        with self._lock:
+            if self._replay is not None:
+                self._replay[job.id] = job
+            if not self.is_built:
+                return
+            self._remove(job.id)
+            if job.deleted_at is None:
+                self._add(job)
+
+    def remove(self, job_id):
+        with self._lock:
+            if self._replay is not None:
+                self._replay[job_id] = None
+            if not self.is_built:
+                return
+            self._remove(job_id)
+
+    def _expand(self, token):
+        # 英數字做前綴比對（維持原本 icontains 打「pyth」找得到 python 的行為）
+        if not is_cjk(token):
+            terms = _prefixed(self.vocabulary, token)
+        elif len(token) > 1:
+            terms = [token]
+        else:
+            # 單一中文字：原本 icontains 任何位置都比對得到，展開成含這個字的所有 bigram
+            terms = set(_prefixed(self.vocabulary, token))
+            terms.update(suffix[::-1] for suffix in _prefixed(self.cjk_suffixes, token))
+        return [term for term in terms if term in self.postings]
+
+    def search(self, query, location=None, tags=None, salary_min=None, salary_max=None):
+        """回傳 (依相關度排序的 job id 列表, 總筆數)。"""
+        self.ensure_built()
+        query_tokens = list(dict.fromkeys(tokenize(query)))
+        if not query_tokens:
+            return [], 0
+
+        with self._lock:
+            total_docs = max(len(self.docs), 1)
+            scores = None
+
+            for token in query_tokens:
+                token_scores = defaultdict(float)
+                for term in self._expand(token):
+                    posting = self.postings[term]
+                    idf = math.log(1 + total_docs / len(posting))
+                    for job_id, weight in posting.items():
+                        token_scores[job_id] += weight * idf
+
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {
+                        job_id: score + token_scores[job_id]
+                        for job_id, score in scores.items()
+                        if job_id in token_scores
+                    }
+                if not scores:
+                    return [], 0
+
+            wanted_tags = set(tags or [])
+            results = []
+            for job_id, score in scores.items():
+                doc = self.docs[job_id]
+                if location and doc["location"] != location:
+                    continue
+                if not wanted_tags <= doc["tags"]:
+                    continue
+                if salary_min is not None and (doc["salary_max"] or 0) < salary_min:
+                    continue
+                if salary_max is not None and (
+                    doc["salary_min"] is None or doc["salary_min"] > salary_max
+                ):
+                    continue
+                results.append((-score, -doc["created_at"], job_id))
+
+        results.sort()
+        return [job_id for _, _, job_id in results], len(results)
+
+
+job_index = JobSearchIndex(
+    enabled=getattr(settings, "JOB_SEARCH_INDEX_ENABLED", True),
+    max_age=getattr(settings, "JOB_SEARCH_INDEX_MAX_AGE", 300),
+)
@@ -1,8 +1,65 @@
-from django.db.models.signals import post_save
+from collections import Counter
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from apps.jobs.models import Job
-from apps.users.models import Notification
+from apps.companies.models import Company
+from apps.jobs import cards, fingerprint, recommend, similar
+from apps.jobs.autocomplete import suggestion_index
+from apps.jobs.facets import tag_facets
+from apps.jobs.models import Job, JobCard, JobRecommendation, SimilarJob
+from apps.jobs.salary import parse_salary
+from apps.jobs.search import job_index
+from apps.users.models import Notification, UserInfo
+from lib.models.counters import bump, bump_many, live_delta
+from lib.models.soft_delete import soft_deleted
+from lib.utils.background import run_after_commit, run_batch_after_commit
+
+
+def refresh_jobs(job_ids):
+    """
+    交易提交後一次載入這批職缺（含公司與標籤），更新記憶體索引、列表卡片與重複指紋；
+    回滾的變動不會留在索引裡，同一個交易存了好幾次也只處理一次。
+    """
+    jobs = Job._base_manager.select_related("company").prefetch_related("tags")
+    jobs = jobs.in_bulk(job_ids)
+    for job_id in job_ids:
+        job = jobs.get(job_id)
+        if job is None:
+            job_index.remove(job_id)
+            tag_facets.remove(job_id)
+            suggestion_index.remove_job(job_id)
+            continue
+        job_index.update(job)
+        tag_facets.update(job)
+        suggestion_index.update_job(job)
+        cards.refresh_job(job)
+        if job.deleted_at is None:
+            fingerprint.refresh(job, [tag.name for tag in job.tags.all()])
+
+
+def refresh_companies(company_ids):
+    companies = Company._base_manager.in_bulk(company_ids)
+    for company in companies.values():
+        suggestion_index.update_company(company)
+        cards.refresh_company(company)
+
+    # 只有公司名稱改變時才需要重建該公司職缺的索引
+    renamed = [
+        company.id
+        for company in companies.values()
+        if job_index.company_titles.get(company.id) not in (None, company.title)
+    ]
+    if renamed:
+        jobs = Job.objects.filter(company_id__in=renamed)
+        for job in jobs.select_related("company").prefetch_related("tags"):
+            job_index.update(job)
+
+
+@receiver(pre_save, sender=Job)
+def job_salary_parse(sender, instance, **kwargs):
+    instance.salary_min, instance.salary_max = parse_salary(instance.salary_range)
 
 
 @receiver(post_save, sender=Job)
@@ -20,3 +77,125 @@ def job_posting_created(sender, instance, created, **kwargs):
                 title="New Job",
                 message=f"{instance.company.title} 發布新職缺：{instance.title}",
             )
+
+
+@receiver(post_save, sender=Job)
+def job_search_index_update(sender, instance, **kwargs):
+    run_batch_after_commit(refresh_jobs, instance.id)
+    if instance.deleted_at is not None:
+        recommend.remove_job(instance.id)
+
+
+@receiver(post_save, sender=Job)
+def similar_jobs_update(sender, instance, created, **kwargs):
+    # 新職缺的標籤在存檔後才加上，交給 job_tags_changed 處理
+    if not created:
+        similar.schedule(instance.id)
+
+
+@receiver(post_save, sender=Job)
+def company_live_job_count(sender, instance, created, update_fields=None, **kwargs):
+    delta = live_delta(instance, created, update_fields)
+    bump(Company, instance.company_id, "live_job_count", delta)
+
+
+@receiver(post_delete, sender=Job)
+def company_live_job_count_delete(sender, instance, **kwargs):
+    if instance.deleted_at is None:
+        bump(Company, instance.company_id, "live_job_count", -1)
+
+
+@receiver(post_save, sender="jobs.JobFavorite")
+def job_favorite_count(sender, instance, created, **kwargs):
+    if created:
+        bump(Job, instance.job_id, "favorite_count", 1)
+
+
+@receiver(post_delete, sender="jobs.JobFavorite")
+def job_favorite_count_delete(sender, instance, **kwargs):
+    bump(Job, instance.job_id, "favorite_count", -1)
+
+
+@receiver(post_save, sender="jobs.Job_Resume")
+def job_application_count(sender, instance, created, **kwargs):
+    if created:
+        bump(Job, instance.job_id, "application_count", 1)
+
+
+@receiver(post_delete, sender="jobs.Job_Resume")
+def job_application_count_delete(sender, instance, **kwargs):
+    bump(Job, instance.job_id, "application_count", -1)
+
+
+@receiver(post_delete, sender=Job)
+def job_search_index_remove(sender, instance, **kwargs):
+    run_batch_after_commit(refresh_jobs, instance.id)
+
+
+@receiver(m2m_changed, sender=Job.tags.through)
+def job_tags_changed(sender, instance, action, **kwargs):
+    if isinstance(instance, Job) and action in (
+        "post_add",
+        "post_remove",
+        "post_clear",
+    ):
+        run_batch_after_commit(refresh_jobs, instance.id)
+        recommend.schedule(instance.id)
+        similar.schedule(instance.id)
+
+
+@receiver(m2m_changed, sender=UserInfo.tags.through)
+def user_tags_changed(sender, instance, action, **kwargs):
+    if isinstance(instance, UserInfo) and action in (
+        "post_add",
+        "post_remove",
+        "post_clear",
+    ):
+        recommend.refresh_user(instance)
+
+
+@receiver(post_save, sender=Company)
+def company_search_index_update(sender, instance, **kwargs):
+    run_batch_after_commit(refresh_companies, instance.id)
+
+
+@receiver(soft_deleted, sender=Job)
+def jobs_soft_deleted(sender, pks, **kwargs):
+    company_ids = Job._base_manager.filter(pk__in=pks).values_list(
+        "company_id", flat=True
+    )
+    bump_many(
+        Company,
+        "live_job_count",
+        {company_id: -count for company_id, count in Counter(company_ids).items()},
+    )
+    JobCard.objects.filter(job_id__in=pks).delete()
+    JobRecommendation.objects.filter(job_id__in=pks).delete()
+    holder_ids = list(
+        SimilarJob.objects.filter(similar_id__in=pks)
+        .exclude(job_id__in=pks)
+        .values_list("job_id", flat=True)
+        .distinct()
+    )
+    SimilarJob.objects.filter(job_id__in=pks).delete()
+    SimilarJob.objects.filter(similar_id__in=pks).delete()
+    if holder_ids:
+        # 清單少了下架的職缺，背景補滿
+        run_after_commit(similar.refresh_lists, holder_ids)
+
+    def remove_from_indexes():
+        for pk in pks:
+            job_index.remove(pk)
+            tag_facets.remove(pk)
+            suggestion_index.remove_job(pk)
+
+    transaction.on_commit(remove_from_indexes)
+
+
+@receiver(soft_deleted, sender=Company)
+def companies_soft_deleted(sender, pks, **kwargs):
+    def remove_from_indexes():
+        for pk in pks:
+            suggestion_index.remove_company(pk)
+
+    transaction.on_commit(remove_from_indexes)
@@ -0,0 +1,220 @@
+import heapq
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count
+from taggit.models import TaggedItem
+
+from lib.utils.background import run_batch_after_commit, run_in_background
+
+NEIGHBORS = getattr(settings, "SIMILAR_JOBS_NEIGHBORS", 10)
+# 單筆更新時最多比較幾筆候選職缺（共同標籤最多的優先），其餘等 build_similar_jobs
+MAX_CANDIDATES = getattr(settings, "SIMILAR_JOBS_MAX_CANDIDATES", 2000)
+# id__in 每批的數量，不超過 SQLite 的參數上限
+BATCH_SIZE = 500
+
+TAG_WEIGHT = 0.7
+LOCATION_WEIGHT = 0.2
+TENURE_WEIGHT = 0.1
+
+
+def similarity(job, other, shared_tags):
+    """
+    job / other 為 (location, tenure, tags)。
+    標籤 Jaccard 為主，同地區與年資接近加分；shared_tags 由呼叫端從反向索引算好。
+    """
+    location, tenure, tags = job
+    other_location, other_tenure, other_tags = other
+    jaccard = shared_tags / (len(tags) + len(other_tags) - shared_tags)
+    same_location = 1.0 if location == other_location else 0.0
+    tenure_proximity = 1.0 / (1 + abs(tenure - other_tenure))
+    return (
+        TAG_WEIGHT * jaccard
+        + LOCATION_WEIGHT * same_location
+        + TENURE_WEIGHT * tenure_proximity
+    )
+
+
+def load_vectors(job_ids=None):
+    from .models import Job
+
+    if job_ids is None:
+        batches = [None]
+    else:
+        job_ids = list(job_ids)
+        batches = [
+            job_ids[start : start + BATCH_SIZE]
+            for start in range(0, len(job_ids), BATCH_SIZE)
+        ]
+
+    content_type = ContentType.objects.get_for_model(Job)
+    vectors = {}
+    for batch in batches:
+        jobs = Job.objects.all()
+        tagged_items = TaggedItem.objects.filter(content_type=content_type)
+        if batch is not None:
+            jobs = jobs.filter(id__in=batch)
+            tagged_items = tagged_items.filter(object_id__in=batch)
+        for job_id, location, tenure in jobs.values_list("id", "location", "tenure"):
+            vectors[job_id] = (location, tenure, set())
+        for object_id, tag_id in tagged_items.values_list(
+            "object_id", "tag_id"
+        ).iterator(chunk_size=5000):
+            if object_id in vectors:
+                vectors[object_id][2].add(tag_id)
+    return vectors
+
+
+def candidate_ids(tag_ids, limit=MAX_CANDIDATES):
+    """有共同標籤的職缺，共同標籤多的（同數量時新的）優先，最多 limit 筆。"""
+    from .models import Job
+
+    return set(
+        TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(Job),
+            tag_id__in=tag_ids,
+        )
+        .values("object_id")
+        .annotate(shared=Count("id"))
+        .order_by("-shared", "-object_id")
+        .values_list("object_id", flat=True)[:limit]
+    )
+
+
+def tag_postings(vectors):
+    postings = defaultdict(list)
+    for job_id, (_, _, tags) in vectors.items():
+        for tag_id in tags:
+            postings[tag_id].append(job_id)
+    return postings
+
+
+def nearest(job_id, vectors, postings, limit=NEIGHBORS):
+    """
+    沿著反向索引累加共同標籤數（等於一次算完與所有職缺的交集大小），
+    沒有共同標籤的職缺不列入候選。
+    """
+    vector = vectors[job_id]
+    shared = Counter()
+    for tag_id in vector[2]:
+        shared.update(postings.get(tag_id, ()))
+    shared.pop(job_id, None)
+    return heapq.nlargest(
+        limit,
+        (
+            (similarity(vector, vectors[other_id], count), other_id)
+            for other_id, count in shared.items()
+        ),
+    )
+
+
+def rebuild(limit=NEIGHBORS, batch_size=1000):
+    from .models import SimilarJob
+
+    vectors = load_vectors()
+    postings = tag_postings(vectors)
+    job_ids = sorted(vectors)
+
+    with transaction.atomic():
+        SimilarJob.objects.all().delete()
+        for start in range(0, len(job_ids), batch_size):
+            SimilarJob.objects.bulk_create(
+                [
+                    SimilarJob(job_id=job_id, similar_id=other_id, score=score)
+                    for job_id in job_ids[start : start + batch_size]
+                    for score, other_id in nearest(job_id, vectors, postings, limit)
+                ]
+            )
+    return len(job_ids)
+
+
+def refresh_lists(job_ids, limit=NEIGHBORS):
+    """整份重算幾筆職缺的相似清單（例如清單裡的職缺下架或改了標籤）。"""
+    from .models import SimilarJob
+
+    job_ids = list(job_ids)
+    for start in range(0, len(job_ids), BATCH_SIZE):
+        batch = job_ids[start : start + BATCH_SIZE]
+        created = []
+        for job_id, vector in load_vectors(batch).items():
+            vectors = load_vectors(candidate_ids(vector[2]) | {job_id})
+            postings = tag_postings(vectors)
+            created.extend(
+                SimilarJob(job_id=job_id, similar_id=other_id, score=score)
+                for score, other_id in nearest(job_id, vectors, postings, limit)
+            )
+
+        with transaction.atomic():
+            SimilarJob.objects.filter(job_id__in=batch).delete()
+            SimilarJob.objects.bulk_create(created)
+
+
+def update_job(job_id, limit=NEIGHBORS):
+    """
+    重算一筆職缺的相似清單，並把它補進（或移出）候選職缺的清單：
+    只有擠得進對方前 limit 名才寫入，擠掉的那筆一併刪除；
+    原本清單裡有它、這次沒被放回去的職缺，整份重算補滿。
+    """
+    from .models import SimilarJob
+
+    holder_ids = set(
+        SimilarJob.objects.filter(similar_id=job_id).values_list("job_id", flat=True)
+    )
+    SimilarJob.objects.filter(similar_id=job_id).delete()
+    SimilarJob.objects.filter(job_id=job_id).delete()
+
+    vector = load_vectors([job_id]).get(job_id)
+    if vector is None or not vector[2]:
+        # 已下架或沒有標籤
+        refresh_lists(sorted(holder_ids), limit)
+        return
+
+    vectors = load_vectors(candidate_ids(vector[2]) | {job_id})
+    postings = tag_postings(vectors)
+    neighbors = nearest(job_id, vectors, postings, limit)
+
+    current = defaultdict(list)
+    for other_id, similar_id, score in SimilarJob.objects.filter(
+        job_id__in=[other_id for _, other_id in neighbors]
+    ).values_list("job_id", "similar_id", "score"):
+        current[other_id].append((score, similar_id))
+
+    created = [
+        SimilarJob(job_id=job_id, similar_id=other_id, score=score)
+        for score, other_id in neighbors
+    ]
+    evicted = []
+    for score, other_id in neighbors:
+        if other_id in holder_ids:
+            continue
+        ranked = current[other_id]
+        if len(ranked) >= limit:
+            lowest = min(ranked)
+            if lowest >= (score, job_id):
+                continue
+            evicted.append((other_id, lowest[1]))
+        created.append(SimilarJob(job_id=other_id, similar_id=job_id, score=score))
+
+    with transaction.atomic():
+        for other_id, similar_id in evicted:
+            SimilarJob.objects.filter(job_id=other_id, similar_id=similar_id).delete()
+        SimilarJob.objects.bulk_create(created)
+    refresh_lists(sorted(holder_ids), limit)
+
+
+def update_jobs(job_ids):
+    for job_id in sorted(job_ids):
+        update_job(job_id)
+
+
+def _update_in_background(job_ids):
+    run_in_background(update_jobs, job_ids)
+
+
+def schedule(job_id):
+    """
+    交易提交後在背景重算。同一個交易裡存檔與標籤變動會呼叫好幾次，合併成一次。
+    """
+    run_batch_after_commit(_update_in_background, job_id)
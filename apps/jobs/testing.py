@@ -0,0 +1,44 @@
+"""各 app 測試共用的資料建立工具。"""
+
+import requests
+
+from apps.companies.models import Company
+from apps.users.models import User
+
+from .models import Job
+
+
+class FailingGeocoder:
+    """模擬 Google 地址查詢連不上，丟出和 requests 一樣的例外。"""
+
+    def __call__(self, address):
+        raise requests.ConnectionError("down")
+
+
+def make_company(title, **fields):
+    user = User.objects.create_user(username=f"{title}-owner", type=2)
+    return Company.objects.create(
+        user=user,
+        title=title,
+        tel="02",
+        url="https://example.com",
+        description="",
+        employees=10,
+        name=title,
+        email="hr@example.com",
+        **{"address": "", **fields},
+    )
+
+
+def make_job(company, title="後端工程師", **fields):
+    return Job.objects.create(
+        company=company,
+        title=title,
+        description=fields.pop("description", "Python / Django"),
+        location=fields.pop("location", "Taipei"),
+        type="全職",
+        contact_info="hr@example.com",
+        salary_range=fields.pop("salary_range", "4萬~6萬"),
+        tenure=1,
+        **fields,
+    )
@@ -0,0 +1,607 @@
+import io
+from unittest import mock, skipUnless
+
+import requests
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from apps.companies import geocoding
+from apps.companies.models import Company, GeocodedAddress
+from apps.jobs import importer, similar
+from apps.jobs.autocomplete import suggestion_index
+from apps.jobs.cards import card_fields
+from apps.jobs.facets import TagFacetIndex, tag_facets
+from apps.jobs.models import Job, Job_Resume, JobCard, JobRecommendation, SimilarJob
+from apps.jobs.salary import parse_salary
+from apps.jobs.search import job_index
+from apps.jobs.testing import make_company, make_job
+from apps.jobs.view_counter import ViewCounter, view_counter
+from apps.resumes.models import Resume
+from apps.users.models import Notification, User, UserInfo
+from lib.utils.models.defined import fetch_coordinates
+
+TAIPEI_101 = (25.033964, 121.564468)
+
+
+@override_settings(GEOCODER="apps.companies.geocoding.FakeGeocoder")
+class NearbyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.near = make_company("信義科技", latitude=25.0330, longitude=121.5654)
+        cls.farther = make_company("內湖科技", latitude=25.0800, longitude=121.5750)
+        cls.far = make_company("高雄科技", latitude=22.6273, longitude=120.3014)
+        # 列表卡片在交易提交後才寫入
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.near_job = make_job(cls.near)
+            cls.farther_job = make_job(cls.farther)
+            cls.far_job = make_job(cls.far)
+
+    def nearby(self, **params):
+        return self.client.get(reverse("jobs:nearby"), params)
+
+    def result_ids(self, response):
+        return [card["id"] for card in response.context["page_obj"]]
+
+    def test_sorted_by_distance_within_radius(self):
+        lat, lng = TAIPEI_101
+        response = self.nearby(lat=lat, lng=lng, radius=10)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.result_ids(response), [self.near_job.id, self.farther_job.id]
+        )
+        self.assertLess(response.context["page_obj"][0]["distance"], 1)
+
+    def test_address_is_geocoded_and_cached(self):
+        response = self.nearby(address="台北市信義區信義路五段7號")
+
+        self.assertTrue(response.context["located"])
+        self.assertTrue(
+            GeocodedAddress.objects.filter(
+                address=geocoding.normalize_address("台北市信義區信義路五段7號")
+            ).exists()
+        )
+
+    @override_settings(GEOCODER="apps.jobs.testing.FailingGeocoder")
+    def test_geocoder_failure_returns_empty_page(self):
+        with self.assertLogs("apps.companies.geocoding", "ERROR"):
+            response = self.nearby(address="台北市信義區")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context["located"])
+        self.assertEqual(self.result_ids(response), [])
+        # 失敗的結果不寫入快取，下次再試
+        self.assertFalse(GeocodedAddress.objects.exists())
+
+    def test_invalid_coordinates_are_ignored(self):
+        response = self.nearby(lat="nan", lng="999", radius="-1")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context["located"])
+        self.assertEqual(response.context["radius"], 10)
+
+
+class SalaryParseTests(SimpleTestCase):
+    def assertParses(self, cases):
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(parse_salary(text), expected)
+
+    def test_monthly_salaries(self):
+        self.assertParses(
+            {
+                "40000": (40000, 40000),
+                "月薪 40,000~60,000元": (40000, 60000),
+                "月薪 40,000 元以上": (40000, 40000),
+                "月薪 3.5萬至4.2萬": (35000, 42000),
+                "月薪2萬8~3萬5": (28000, 35000),
+                "4-6萬": (40000, 60000),
+                "40k-60k": (40000, 60000),
+                "待遇面議（經常性薪資達 4 萬元或以上）": (40000, 40000),
+            }
+        )
+
+    def test_annual_salaries_are_divided_by_twelve(self):
+        self.assertParses({"年薪 120萬~180萬": (100000, 150000)})
+
+    def test_unparseable_salaries(self):
+        self.assertParses(
+            {
+                "": (None, None),
+                "面議": (None, None),
+                "時薪 190元": (None, None),
+                "日薪 1,500": (None, None),
+                "月薪 99999999": (None, None),
+                "1e9": (None, None),
+                "1.5E5": (None, None),
+            }
+        )
+
+    def test_years_and_dates_are_not_amounts(self):
+        self.assertParses(
+            {
+                "2024年 40000": (40000, 40000),
+                "2024/10 起 月薪 45000": (45000, 45000),
+                "2024-10-01 起 月薪 45000": (45000, 45000),
+                "2024年薪 120萬": (100000, 100000),
+                "20000-30000": (20000, 30000),
+            }
+        )
+
+
+class FetchCoordinatesTests(TestCase):
+    @mock.patch("lib.utils.models.defined.requests.get")
+    def test_timeout_is_passed_and_errors_are_caught(self, get):
+        get.side_effect = requests.Timeout()
+
+        with self.assertLogs("lib.utils.models.defined", "WARNING"):
+            self.assertIsNone(fetch_coordinates("台北市", timeout=3))
+        self.assertEqual(get.call_args.kwargs["timeout"], 3)
+
+    @mock.patch("lib.utils.models.defined.requests.get")
+    def test_api_error_status_is_a_failure(self, get):
+        get.return_value.json.return_value = {"status": "OVER_QUERY_LIMIT"}
+
+        with self.assertLogs("lib.utils.models.defined", "WARNING"):
+            self.assertIsNone(fetch_coordinates("台北市"))
+
+    @mock.patch("lib.utils.models.defined.requests.get")
+    def test_zero_results(self, get):
+        get.return_value.json.return_value = {"status": "ZERO_RESULTS", "results": []}
+
+        self.assertEqual(fetch_coordinates("不存在的地址"), (None, None))
+
+
+@override_settings(BACKGROUND_ASYNC=False)
+class RecommendationTests(TestCase):
+    def setUp(self):
+        # 記憶體裡的標籤統計是全域的，先以這個測試的資料重建
+        tag_facets.rebuild()
+
+    def test_tagged_job_is_recommended_after_commit(self):
+        user = User.objects.create_user(username="seeker", password="x")
+        user_info = UserInfo.objects.create(user=user)
+        user_info.tags.add("python")
+        job = make_job(make_company("推薦科技"))
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            job.tags.add("python", "django")
+            self.assertFalse(JobRecommendation.objects.exists())
+
+        self.assertTrue(callbacks)
+        self.assertTrue(JobRecommendation.objects.filter(user=user, job=job).exists())
+
+
+@override_settings(BACKGROUND_ASYNC=False)
+class SimilarJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = make_company("相似科技")
+        cls.job = make_job(cls.company)
+        cls.closest = make_job(cls.company)
+        cls.other = make_job(cls.company, location="Tainan")
+        cls.job.tags.add("python", "django")
+        cls.closest.tags.add("python", "django")
+        cls.other.tags.add("python")
+
+    def similar_ids(self, job):
+        return list(
+            SimilarJob.objects.filter(job=job)
+            .order_by("-score")
+            .values_list("similar_id", flat=True)
+        )
+
+    def test_save_and_tag_change_schedule_one_update(self):
+        with mock.patch.object(similar, "update_job") as update_job:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    job = make_job(self.company)
+                    job.tags.add("python", "flask")
+                    job.tags.remove("flask")
+                    job.save()
+                update_job.assert_not_called()
+
+        self.assertEqual(update_job.call_args_list.count(mock.call(job.id)), 1)
+
+    def test_lists_are_backfilled_when_a_neighbor_leaves(self):
+        similar.rebuild(limit=1)
+        self.assertEqual(self.similar_ids(self.job), [self.closest.id])
+
+        self.closest.tags.clear()
+        similar.update_job(self.closest.id, limit=1)
+
+        self.assertEqual(self.similar_ids(self.job), [self.other.id])
+
+    def test_load_vectors_batches_large_id_lists(self):
+        ids = [self.job.id, *range(100_000, 102_000)]
+
+        self.assertEqual(list(similar.load_vectors(ids)), [self.job.id])
+
+
+class TagFacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.job = make_job(make_company("標籤科技"))
+        cls.job.tags.add("python")
+
+    def test_stale_index_is_rebuilt_in_background(self):
+        index = TagFacetIndex(max_age=0)
+        index.rebuild()
+
+        with mock.patch("apps.jobs.facets.run_in_background") as run:
+            with self.assertNumQueries(0):
+                self.assertEqual(index.top_tags(), [("python", 1)])
+                index.top_tags()
+
+        run.assert_called_once_with(index.rebuild)
+
+    def test_waiting_request_does_not_rebuild_again(self):
+        index = TagFacetIndex()
+        index.ensure_built()
+
+        with self.assertNumQueries(0):
+            index.rebuild(if_missing=True)
+
+    def test_changes_during_rebuild_are_replayed(self):
+        index = TagFacetIndex()
+        load = index._load
+
+        def load_then_change():
+            fresh = load()
+            self.job.tags.add("django")
+            index.update(self.job)
+            return fresh
+
+        with mock.patch.object(index, "_load", load_then_change):
+            index.rebuild()
+
+        self.assertEqual(index.counts, {"python": 1, "django": 1})
+
+
+@override_settings(BACKGROUND_ASYNC=False)
+class SuggestionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        company = make_company("建議科技")
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.jobs = [make_job(company) for _ in range(3)]
+            for job in cls.jobs[:2]:
+                job.tags.add("pa", "pb")
+            cls.jobs[2].tags.add("pc")
+
+    def setUp(self):
+        # 記憶體索引是全域的，先以這個測試的資料重建
+        tag_facets.rebuild()
+        suggestion_index.rebuild()
+
+    def texts(self, prefix, limit):
+        return [item["text"] for item in suggestion_index.search(prefix, limit)]
+
+    @mock.patch("apps.jobs.autocomplete.TOP_K", 2)
+    def test_tag_rising_into_the_top_replaces_the_cached_ranking(self):
+        self.assertEqual(self.texts("p", 2), ["pa", "pb"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for job in self.jobs[:2]:
+                job.tags.add("pc")
+
+        self.assertEqual(self.texts("p", 2), ["pc", "pa"])
+
+    def test_stale_index_is_rebuilt_in_background(self):
+        suggestion_index.invalidate()
+        tag_facets.invalidate()
+        # 背景重建被換掉了，結束時重建一次讓索引回到正常狀態
+        self.addCleanup(suggestion_index.rebuild)
+        self.addCleanup(tag_facets.rebuild)
+
+        with mock.patch("apps.jobs.autocomplete.run_in_background") as run, mock.patch(
+            "apps.jobs.facets.run_in_background"
+        ):
+            with self.assertNumQueries(0):
+                self.assertEqual(self.texts("pa", 8), ["pa"])
+
+        run.assert_called_once_with(suggestion_index.rebuild)
+
+
+@override_settings(BACKGROUND_ASYNC=False)
+class IndexRefreshTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = make_company("索引科技")
+
+    def updated_ids(self, update):
+        return [call.args[0].id for call in update.call_args_list]
+
+    def test_saves_in_one_transaction_refresh_once_after_commit(self):
+        with mock.patch.object(job_index, "update") as update:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    job = make_job(self.company)
+                    job.tags.add("python")
+                    job.save()
+                update.assert_not_called()
+
+        self.assertEqual(self.updated_ids(update).count(job.id), 1)
+        self.assertTrue(JobCard.objects.filter(job=job, tags=["python"]).exists())
+
+    def test_rolled_back_save_is_not_indexed(self):
+        with mock.patch.object(job_index, "update") as update:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                with self.assertRaises(RuntimeError):
+                    with transaction.atomic():
+                        make_job(self.company)
+                        raise RuntimeError
+
+        self.assertEqual(callbacks, [])
+        update.assert_not_called()
+
+
+class JobDetailTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        company = make_company("詳細科技")
+        cls.job = make_job(company)
+        cls.job.tags.add("python", "django")
+        for _ in range(3):
+            other = make_job(company)
+            SimilarJob.objects.create(job=cls.job, similar=other, score=0.5)
+        cls.seeker = User.objects.create_user(username="detail-seeker", password="x")
+        cls.resume = Resume.objects.create(
+            userinfo=UserInfo.objects.create(user=cls.seeker), name="履歷"
+        )
+
+    def setUp(self):
+        # 瀏覽次數累積在全域的計數器，不留給之後的測試
+        self.addCleanup(view_counter.clear)
+
+    def show(self):
+        return self.client.get(reverse("jobs:show", args=[self.job.id]))
+
+    def test_query_count_for_anonymous_visitor(self):
+        # 職缺＋公司、標籤、相似職缺＋公司
+        with self.assertNumQueries(3):
+            response = self.show()
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_query_count_for_job_seeker(self):
+        self.client.force_login(self.seeker)
+        Job_Resume.objects.create(job=self.job, resume=self.resume)
+
+        # session、使用者、職缺（含是否應徵 / 收藏）、標籤、相似職缺，
+        # 加上版型的通知數量、通知列表與 UserInfo
+        with self.assertNumQueries(8):
+            response = self.show()
+
+        self.assertTrue(response.context["status"])
+
+    def test_deleted_resume_is_not_an_application(self):
+        self.client.force_login(self.seeker)
+        Job_Resume.objects.create(job=self.job, resume=self.resume)
+        self.resume.mark_delete()
+
+        self.assertFalse(self.show().context["status"])
+
+
+class ViewCounterTests(TestCase):
+    def test_auto_flush_is_off_under_tests(self):
+        counter = ViewCounter()
+
+        with mock.patch.object(counter, "_start_flushing") as start:
+            counter.hit(1)
+            with override_settings(JOB_VIEW_AUTO_FLUSH=True):
+                counter.hit(1)
+                counter.hit(2)
+
+        start.assert_called_once_with()
+        counter.clear()
+
+    def test_flush_writes_buffered_hits(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = make_job(make_company("瀏覽科技"))
+        counter = ViewCounter(flush_threshold=3)
+
+        counter.hit(job.id)
+        counter.hit(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.view_count, 0)
+
+        counter.hit(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.view_count, 3)
+        self.assertEqual(JobCard.objects.get(job=job).view_count, 3)
+
+        counter.hit(job.id)
+        counter.clear()
+        counter.flush()
+        job.refresh_from_db()
+        self.assertEqual(job.view_count, 3)
+
+
+@skipUnless(connection.vendor == "postgresql", "部分索引的查詢計畫只在 PostgreSQL 檢查")
+class LiveIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = make_company("索引科技")
+        job = make_job(cls.company)
+        JobCard.objects.create(job=job, **card_fields(job, cls.company, ()))
+
+    def assertUsesIndex(self, queryset, index_name):
+        with connection.cursor() as cursor:
+            # 資料量太小時規劃器一定選全表掃描，關掉後才看得出索引是否用得上
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_sort = off")
+        self.assertIn(index_name, queryset.explain())
+
+    def test_latest_jobs(self):
+        # 職缺列表頁（jobs:index）的游標分頁
+        self.assertUsesIndex(
+            JobCard.objects.order_by("-created_at", "-job_id")[:10],
+            "jobcard_created_job_idx",
+        )
+
+    def test_company_jobs(self):
+        # 公司職缺頁（companies:jobs_index）的游標分頁
+        other = make_company("其他科技")
+        jobs = Job.objects.bulk_create(
+            Job(company=other, title="前端", location="Taipei", tenure=1)
+            for _ in range(200)
+        )
+        JobCard.objects.bulk_create(
+            JobCard(job=job, **card_fields(job, other, ())) for job in jobs
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {JobCard._meta.db_table}")
+        self.assertUsesIndex(
+            JobCard.objects.filter(company=self.company).order_by(
+                "-created_at", "-job_id"
+            )[:10],
+            "jobcard_company_created_idx",
+        )
+
+    def test_most_viewed_jobs(self):
+        self.assertUsesIndex(
+            Job.objects.order_by("-view_count", "-created_at")[:10],
+            "job_live_views_created_idx",
+        )
+
+    def test_latest_companies(self):
+        self.assertUsesIndex(
+            Company.objects.order_by("-created_at", "-id")[:10],
+            "company_live_created_id_idx",
+        )
+
+
+class EditPermissionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = make_company("權限科技")
+        cls.job = make_job(cls.company)
+
+    def edit(self, job_id):
+        return self.client.get(reverse("jobs:edit", args=[job_id]))
+
+    def test_owner_can_edit(self):
+        self.client.force_login(self.company.user)
+
+        response = self.edit(self.job.id)
+
+        self.assertTemplateUsed(response, "jobs/edit.html")
+        self.assertEqual(response.context["job"], self.job)
+
+    def test_other_user_sees_no_permission(self):
+        self.client.force_login(User.objects.create_user(username="其他人"))
+
+        self.assertTemplateUsed(self.edit(self.job.id), "no_permission.html")
+
+    def test_missing_job_is_not_found(self):
+        self.assertEqual(self.edit(self.job.id + 1000).status_code, 404)
+
+        self.client.force_login(self.company.user)
+        self.assertEqual(self.edit(self.job.id + 1000).status_code, 404)
+
+
+class DuplicateJobTests(TestCase):
+    def test_duplicate_points_to_the_root_job(self):
+        company = make_company("重複科技")
+        # 指紋在交易提交後才計算
+        with self.captureOnCommitCallbacks(execute=True):
+            root = make_job(company, title="會計助理", description="處理帳務與報表")
+            first = make_job(company, description="Python Django 後端開發，維護 API")
+        # first 先被（人工）標成 root 的重複，再來的相同職缺要直接指向 root
+        Job.objects.filter(pk=first.pk).update(duplicate_of=root)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second = make_job(company, description="Python Django 後端開發，維護 API")
+
+        second.refresh_from_db()
+        self.assertEqual(second.duplicate_of_id, root.id)
+
+
+IMPORT_HEADER = (
+    "title,type,location,tenure,salary_range,contact_info,description,tags\n"
+)
+
+
+def import_row(title):
+    return f"{title},full-time,Taipei,1,40000~60000,hr@example.com,Python,python\n"
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        self.company = make_company("匯入科技")
+
+    def import_csv(self, data, **kwargs):
+        return importer.import_jobs(
+            self.company, importer.iter_rows(io.BytesIO(data), "csv"), **kwargs
+        )
+
+    def test_valid_rows_are_imported(self):
+        result = self.import_csv(
+            (
+                IMPORT_HEADER + import_row("後端工程師") + import_row("前端工程師")
+            ).encode()
+        )
+
+        self.assertEqual((result.created, result.failed), (2, 0))
+        self.assertIsNone(result.file_error)
+        self.assertEqual(self.company.jobs.count(), 2)
+
+    def test_big5_file_imports_nothing(self):
+        # 前面幾千行都是 ASCII，解碼錯誤出現在已經存了好幾批之後
+        data = (
+            IMPORT_HEADER + import_row("Backend") * 2000 + import_row("後端工程師")
+        ).encode("big5")
+
+        result = self.import_csv(data, batch_size=10)
+
+        self.assertEqual(result.created, 0)
+        self.assertIn("UTF-8", result.file_error)
+        self.assertIn("沒有新增任何職缺", result.summary())
+        self.assertFalse(Job.objects.exists())
+
+    def test_broken_quoting_rolls_back_earlier_batches(self):
+        data = (
+            IMPORT_HEADER + import_row("後端工程師") * 3 + '"未結束的引號,full-time\n'
+        )
+
+        result = self.import_csv(data.encode(), batch_size=1)
+
+        self.assertEqual(result.created, 0)
+        self.assertIn("第 5 行", result.file_error)
+        self.assertFalse(Job.objects.exists())
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.live_job_count, 0)
+
+    @override_settings(
+        STORAGES={
+            "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+            "staticfiles": {
+                "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+            },
+        },
+        BACKGROUND_ASYNC=False,
+        JOB_IMPORT_SYNC_MAX_BYTES=10,
+    )
+    def test_large_upload_is_imported_in_background(self):
+        self.client.force_login(self.company.user)
+        upload = SimpleUploadedFile(
+            "jobs.csv", (IMPORT_HEADER + import_row("後端工程師")).encode()
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("companies:jobs_import", args=[self.company.id]),
+                {"file": upload},
+            )
+
+        self.assertRedirects(
+            response,
+            reverse("companies:jobs_index", args=[self.company.id]),
+            fetch_redirect_response=False,
+        )
+        self.assertEqual(self.company.jobs.count(), 1)
+        notification = Notification.objects.get(recipient=self.company.user)
+        self.assertIn("新增 1 筆", notification.message)
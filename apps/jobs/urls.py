@@ -10,4 +10,6 @@ urlpatterns = [
     path("<int:id>/edit", views.edit, name="edit"),
     path("<int:id>/delete", views.delete, name="delete"),
     path("search/", views.search_results, name="search_results"),
+    path("nearby/", views.nearby, name="nearby"),
+    path("autocomplete/", views.autocomplete, name="autocomplete"),
 ]
@@ -0,0 +1,100 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Case, F, Value, When
+
+logger = logging.getLogger(__name__)
+
+
+def increments(field, by_delta):
+    return Case(
+        *[
+            When(**{f"{field}__in": job_ids}, then=Value(delta))
+            for delta, job_ids in by_delta.items()
+        ],
+        default=Value(0),
+    )
+
+
+class ViewCounter:
+    """
+    職缺瀏覽次數先累積在記憶體，累積 flush_threshold 次，或背景執行緒每
+    flush_interval 秒檢查一次，才用一句 UPDATE 寫回；程序被強制結束最多只會少算最後幾秒。
+    JOB_VIEW_AUTO_FLUSH=False（測試時）不啟動背景執行緒，程序結束時也不寫回。
+    """
+
+    def __init__(self, flush_interval=5, flush_threshold=500):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._hits = 0
+        self._timer_pid = None
+
+    def hit(self, job_id):
+        with self._lock:
+            self._pending[job_id] += 1
+            self._hits += 1
+            due = self._hits >= self.flush_threshold
+            # fork 出來的 worker 沒有父程序的執行緒，第一次用到時才各自啟動
+            auto_flush = getattr(settings, "JOB_VIEW_AUTO_FLUSH", True)
+            if auto_flush and self._timer_pid != os.getpid():
+                self._timer_pid = os.getpid()
+                self._start_flushing()
+        if due:
+            self.flush()
+
+    def _start_flushing(self):
+        threading.Thread(
+            target=self._flush_periodically, name="view-counter", daemon=True
+        ).start()
+        atexit.register(self.flush)
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.flush_interval)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("寫回職缺瀏覽次數失敗")
+            finally:
+                close_old_connections()
+
+    def clear(self):
+        """丟掉還沒寫回的次數（測試結束時用）。"""
+        with self._lock:
+            self._pending = Counter()
+            self._hits = 0
+
+    def flush(self):
+        from .models import Job, JobCard
+
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._hits = 0
+        if not pending:
+            return
+
+        # 同樣增加量的職缺合成一個 When，每張表整批只有一句 UPDATE
+        by_delta = {}
+        for job_id, delta in pending.items():
+            by_delta.setdefault(delta, []).append(job_id)
+        Job._base_manager.filter(id__in=pending).update(
+            view_count=F("view_count") + increments("id", by_delta)
+        )
+        JobCard.objects.filter(job_id__in=pending).update(
+            view_count=F("view_count") + increments("job_id", by_delta)
+        )
+
+
+view_counter = ViewCounter(
+    flush_interval=getattr(settings, "JOB_VIEW_FLUSH_INTERVAL", 5),
+    flush_threshold=getattr(settings, "JOB_VIEW_FLUSH_THRESHOLD", 500),
+)
@@ -1,59 +1,54 @@
 import json
+import math
 from urllib.parse import parse_qs, urlparse
 
-import rules
 from django.contrib import messages
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.http import require_POST
 from taggit.models import Tag, TaggedItem
 
-from apps.resumes.models import Resume
-from apps.users.models import UserInfo
-from lib.models.paginate import paginate_queryset
+from apps.companies import geocoding
+from apps.companies.models import Company
+from apps.users.viewer_context import ViewerContext
+from lib.models.paginate import paginate_cursor, paginate_queryset
+from lib.models.rule_cache import get_cached_object_or_404
 from lib.models.rule_required import rule_required
+from lib.models.search_backend import get_search_backend
+from lib.utils.geo import cells_within, haversine
 from lib.utils.models.defined import LOCATION_CHOICES
 
+from .autocomplete import suggestion_index
+from .cards import card_dict, load_cards
+from .facets import tag_facets
 from .forms.jobs_form import JobForm
-from .models import Job, Job_Resume, JobFavorite
+from .models import Job, Job_Resume, JobCard, JobFavorite, SimilarJob
+from .search import job_index
+from .view_counter import view_counter
+
+NEARBY_DEFAULT_RADIUS = 10
+NEARBY_MAX_RADIUS = 50
 
 
 def index(request):
-    jobs = Job.objects.order_by("-id").select_related("company")
+    jobs = JobCard.objects.all()
     company = []
     locations = LOCATION_CHOICES
 
     if request.user.is_authenticated and request.user.type == 2:
         company = request.user.company
 
-    jobs = Job.objects.order_by("-id")
-
     job_form = JobForm()
 
-    jobs_with_permissions = [
-        {
-            "id": job.id,
-            "title": job.title,
-            "description": job.description,
-            "type": job.type,
-            "created_at": job.created_at,
-            "get_location_display": job.get_location_display,
-            "location": job.location,
-            "salary_range": job.salary_range,
-            "company": job.company.title,
-            "company_id": job.company.id,
-            "can_edit": rules.test_rule("can_edit_job", request.user, job.id),
-            "favorited": (
-                JobFavorite.objects.filter(job=job, user=request.user).exists()
-                if request.user.is_authenticated
-                else False
-            ),
-        }
-        for job in jobs
-    ]
+    page_obj = paginate_cursor(request, jobs, 10, ordering=("-created_at", "-job_id"))
+    viewer = ViewerContext.for_request(request).load_jobs(
+        card.job_id for card in page_obj
+    )
+    page_obj.object_list = [card_dict(card, viewer) for card in page_obj]
 
-    page_obj = paginate_queryset(request, jobs_with_permissions, 10)
     return render(
         request,
         "jobs/index.html",
@@ -67,18 +62,34 @@ def index(request):
 
 
 def show(request, id):
-    job = get_object_or_404(Job, pk=id)
+    jobs = Job.objects.select_related("company").prefetch_related("tags")
+    if request.user.is_authenticated and request.user.type == 1:
+        jobs = jobs.annotate(
+            applied=Exists(
+                Job_Resume.objects.filter(
+                    job=OuterRef("pk"),
+                    resume__userinfo__user=request.user,
+                    resume__deleted_at=None,
+                )
+            ),
+            favorited=Exists(
+                JobFavorite.objects.filter(job=OuterRef("pk"), user=request.user)
+            ),
+        )
+    job = get_object_or_404(jobs, pk=id)
     if request.method == "POST":
         form = JobForm(request.POST, instance=job)
         if form.is_valid():
-            job = form.save(commit=False)
+            # 存檔與標籤一起提交，提交後的背景工作（相似職缺等）只排一次
+            with transaction.atomic():
+                job = form.save(commit=False)
 
-            tags = request.POST.get("tags")
-            if tags:
-                tags = [tag["value"] for tag in json.loads(tags)]
-                job.tags.set(tags, clear=False)
+                tags = request.POST.get("tags")
+                if tags:
+                    tags = [tag["value"] for tag in json.loads(tags)]
+                    job.tags.set(tags, clear=False)
 
-            job.save()
+                job.save()
             messages.success(request, "更新成功")
             return redirect("jobs:show", job.id)
         else:
@@ -93,26 +104,24 @@ def show(request, id):
     search_query = query_params.get("q", [""])[0]
     location = query_params.get("location", [""])[0]
 
-    status = False
-    favorited = False
+    view_counter.hit(job.id)
 
-    if request.user.is_authenticated and request.user.type == 1:
-        try:
-            user_info = UserInfo.objects.get(user=request.user)
-            user_resume = Resume.objects.filter(userinfo=user_info).values_list(
-                "id", flat=True
-            )
-            status = Job_Resume.objects.filter(job=job, resume__in=user_resume).exists()
-            favorited = JobFavorite.objects.filter(job=job, user=request.user).exists()
+    status = getattr(job, "applied", False)
+    favorited = getattr(job, "favorited", False)
 
-        except UserInfo.DoesNotExist:
-            user_info = None
+    similar_jobs = [
+        similar_job.similar
+        for similar_job in SimilarJob.objects.filter(job=job, similar__deleted_at=None)
+        .select_related("similar__company")
+        .order_by("-score")[:5]
+    ]
 
     return render(
         request,
         "jobs/show.html",
         {
             "job": job,
+            "similar_jobs": similar_jobs,
             "tags": job.tags.all(),
             "status": status,
             "is_search_result": is_search_result,
@@ -125,7 +134,7 @@ def show(request, id):
 
 @rule_required("can_edit_job")
 def edit(request, id):
-    job = get_object_or_404(Job, pk=id)
+    job = get_cached_object_or_404(request, Job, id)
     form = JobForm(instance=job)
     tags = list(job.tags.values_list("name", flat=True))
 
@@ -140,76 +149,106 @@ def delete(request, id):
     return redirect("jobs:index")
 
 
+def paginate_job_ids(request, job_ids):
+    page_obj = paginate_queryset(request, job_ids, 10)
+    page_obj.object_list = load_cards(page_obj.object_list)
+    return page_obj
+
+
+def salary_param(request, name):
+    try:
+        return int(request.GET.get(name, ""))
+    except ValueError:
+        return None
+
+
+def collapse_duplicates(job_ids):
+    """拿掉原始職缺仍在架上的重複職缺，只留最早刊登的那一筆。"""
+    duplicate_ids = set(
+        Job.objects.exclude(duplicate_of=None)
+        .filter(duplicate_of__deleted_at=None)
+        .values_list("id", flat=True)
+    )
+    return [job_id for job_id in job_ids if job_id not in duplicate_ids]
+
+
 def search_results(request):
+    search_backend = get_search_backend()
     search_term = request.GET.get("q")
     location = request.GET.get("location")
     tags = request.GET.getlist("tags")
-    search_filter = Q()
-    job_content_type = ContentType.objects.get_for_model(Job)
-
-    if search_term:
-        tagged_items = TaggedItem.objects.filter(
-            tag__name__icontains=search_term, content_type=job_content_type
+    salary_min = salary_param(request, "salary_min")
+    salary_max = salary_param(request, "salary_max")
+    salary_filtered = salary_min is not None or salary_max is not None
+    collapse = request.GET.get("collapse") == "1"
+
+    if search_term and job_index.enabled:
+        job_ids, count = job_index.search(
+            search_term,
+            location=location,
+            tags=tags,
+            salary_min=salary_min,
+            salary_max=salary_max,
         )
-        job_ids_with_tags = tagged_items.values_list("object_id", flat=True)
+        if collapse:
+            job_ids = collapse_duplicates(job_ids)
+            count = len(job_ids)
+        page_obj = paginate_job_ids(request, job_ids)
+    elif tags and not search_term and not salary_filtered:
+        job_ids = tag_facets.job_ids(tags, location=location)
+        if collapse:
+            job_ids = collapse_duplicates(job_ids)
+        count = len(job_ids)
+        page_obj = paginate_job_ids(request, job_ids)
+    else:
+        job_content_type = ContentType.objects.get_for_model(Job)
+        search_filter = Q()
+
+        if search_term:
+            tagged_items = TaggedItem.objects.filter(
+                tag__in=search_backend.filter(Tag.objects.all(), ["name"], search_term),
+                content_type=job_content_type,
+            )
+            search_filter &= search_backend.q(
+                ["title", "company__title", "location"], search_term
+            ) | Q(id__in=tagged_items.values_list("object_id", flat=True))
 
-        search_filter &= (
-            Q(title__icontains=search_term)
-            | Q(company__title__icontains=search_term)
-            | Q(location__icontains=search_term)
-            | Q(id__in=job_ids_with_tags)
-        )
+        if location:
+            search_filter &= Q(location=location)
 
-    if location:
-        search_filter &= Q(location=location)
+        for tag in tags:
+            tagged_items = TaggedItem.objects.filter(
+                tag__name=tag, content_type=job_content_type
+            )
+            job_ids_with_tags = tagged_items.values_list("object_id", flat=True)
+            search_filter &= Q(id__in=job_ids_with_tags)
 
-    if tags:
-        tagged_items = TaggedItem.objects.filter(
-            tag__name__in=tags, content_type=job_content_type
-        )
-        job_ids_with_tags = tagged_items.values_list("object_id", flat=True)
-        search_filter &= Q(id__in=job_ids_with_tags)
-
-    jobs = (
-        Job.objects.filter(search_filter)
-        .select_related("company")
-        .distinct()
-        .order_by("-created_at")
-    )
+        if salary_min is not None:
+            search_filter &= Q(salary_max__gte=salary_min)
 
-    count = jobs.count()
+        if salary_max is not None:
+            search_filter &= Q(salary_min__lte=salary_max)
 
-    jobs_with_permissions = [
-        {
-            "id": job.id,
-            "title": job.title,
-            "description": job.description,
-            "type": job.type,
-            "created_at": job.created_at,
-            "get_location_display": job.get_location_display,
-            "location": job.location,
-            "salary_range": job.salary_range,
-            "company": job.company.title,
-            "company_id": job.company.id,
-            "can_edit": rules.test_rule("can_edit_job", request.user, job.id),
-            "favorited": (
-                JobFavorite.objects.filter(job=job, user=request.user).exists()
-                if request.user.is_authenticated
-                else False
-            ),
-        }
-        for job in jobs
-    ]
+        if collapse:
+            search_filter &= Q(duplicate_of=None) | Q(
+                duplicate_of__deleted_at__isnull=False
+            )
+
+        job_ids = (
+            Job.objects.filter(search_filter)
+            .order_by("-created_at")
+            .values_list("id", flat=True)
+        )
+        page_obj = paginate_job_ids(request, job_ids)
+        count = page_obj.paginator.count
 
-    applied_job_ids = []
-    if request.user.is_authenticated:
-        applied_job_ids = Job_Resume.objects.filter(
-            resume__userinfo__user=request.user
-        ).values_list("job_id", flat=True)
+    viewer = ViewerContext.for_request(request).load_jobs(
+        card.job_id for card in page_obj
+    )
+    page_obj.object_list = [card_dict(card, viewer) for card in page_obj]
 
     current_page = request.GET.get("page", 1)
-    page_obj = paginate_queryset(request, jobs_with_permissions, 10)
-    all_tags = Tag.objects.all()
+    tag_counts = tag_facets.top_tags(location=location, limit=20)
 
     location_dict = dict(LOCATION_CHOICES)
     location_label = location_dict.get(location)
@@ -220,12 +259,96 @@ def search_results(request):
         {
             "page_obj": page_obj,
             "tags": tags,
-            "all_tags": all_tags,
+            "selected_tags": tags,
+            "tag_counts": tag_counts,
             "search_term": search_term,
             "location": location_label,
             "locations": LOCATION_CHOICES,
-            "applied_job_ids": list(applied_job_ids),
+            "applied_job_ids": list(viewer.applied_job_ids),
             "current_page": current_page,
             "count": count,
+            "salary_min": salary_min,
+            "salary_max": salary_max,
+            "collapse": collapse,
+        },
+    )
+
+
+def coordinate_param(request, name, limit):
+    try:
+        value = float(request.GET.get(name, ""))
+    except ValueError:
+        return None
+    if not math.isfinite(value) or abs(value) > limit:
+        return None
+    return value
+
+
+def nearby(request):
+    address = request.GET.get("address", "").strip()
+    lat = coordinate_param(request, "lat", 90)
+    lng = coordinate_param(request, "lng", 180)
+    if (lat is None or lng is None) and address:
+        lat, lng = geocoding.lookup(address) or (None, None)
+
+    try:
+        radius = float(request.GET.get("radius", NEARBY_DEFAULT_RADIUS))
+    except ValueError:
+        radius = NEARBY_DEFAULT_RADIUS
+    if not math.isfinite(radius) or radius <= 0:
+        radius = NEARBY_DEFAULT_RADIUS
+    radius = min(radius, NEARBY_MAX_RADIUS)
+
+    job_ids = []
+    distances = {}
+    if lat is not None and lng is not None:
+        # 先用網格挑出候選公司，再算精確距離，排除方框角落超出半徑的
+        cells = cells_within(lat, lng, radius)
+        for company_id, company_lat, company_lng in Company.objects.filter(
+            geo_cell__in=cells
+        ).values_list("id", "latitude", "longitude"):
+            distance = haversine(lat, lng, float(company_lat), float(company_lng))
+            if distance <= radius:
+                distances[company_id] = distance
+
+        rows = [
+            (job_id, company_id, created_at)
+            for job_id, company_id, created_at in Job.objects.filter(
+                company__geo_cell__in=cells
+            ).values_list("id", "company_id", "created_at")
+            if company_id in distances
+        ]
+        rows.sort(key=lambda row: (distances[row[1]], -row[2].timestamp()))
+        job_ids = [job_id for job_id, _, _ in rows]
+
+    page_obj = paginate_job_ids(request, job_ids)
+    viewer = ViewerContext.for_request(request).load_jobs(
+        card.job_id for card in page_obj
+    )
+    job_cards = []
+    for card in page_obj:
+        job_card = card_dict(card, viewer)
+        job_card["distance"] = distances[card.company_id]
+        job_cards.append(job_card)
+    page_obj.object_list = job_cards
+
+    return render(
+        request,
+        "jobs/search_results.html",
+        {
+            "page_obj": page_obj,
+            "search_term": address or "附近的工作",
+            "locations": LOCATION_CHOICES,
+            "applied_job_ids": list(viewer.applied_job_ids),
+            "current_page": request.GET.get("page", 1),
+            "count": len(job_ids),
+            "nearby": True,
+            "radius": radius,
+            "located": lat is not None and lng is not None,
         },
     )
+
+
+def autocomplete(request):
+    suggestions = suggestion_index.search(request.GET.get("q", ""))
+    return JsonResponse({"suggestions": suggestions})
@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from lib.models.search_backend import trigram_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0008_remove_comment_parent"),
+    ]
+
+    operations = [
+        trigram_index("posts_post", "title"),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.1 on 2026-10-18 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0009_post_title_trigram_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("deleted_at", None)),
+                fields=["-created_at", "-id"],
+                name="post_live_created_id_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("deleted_at", None)),
+                fields=["company", "-created_at", "-id"],
+                name="post_live_company_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("deleted_at", None)),
+                fields=["user", "-created_at"],
+                name="post_live_user_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                condition=models.Q(("deleted_at", None)),
+                fields=["post", "created_at"],
+                name="comment_live_post_created_idx",
+            ),
+        ),
+    ]
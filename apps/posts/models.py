@@ -2,7 +2,7 @@ from django.db import models
 
 from apps.companies.models import Company
 from apps.users.models import User
-from lib.models.soft_delete import SoftDeleteManager, SoftDeletetable
+from lib.models.soft_delete import SoftDeleteManager, SoftDeletetable, live_index
 
 
 class Post(SoftDeletetable, models.Model):
@@ -29,9 +29,16 @@ class Post(SoftDeletetable, models.Model):
 
     objects = SoftDeleteManager()
 
+    soft_delete_cascade = ("comments",)
+
     class Meta:
         indexes = [
             models.Index(fields=["deleted_at"]),
+            live_index("-created_at", "-id", name="post_live_created_id_idx"),
+            live_index(
+                "company", "-created_at", "-id", name="post_live_company_created_idx"
+            ),
+            live_index("user", "-created_at", name="post_live_user_created_idx"),
         ]
 
     def __str__(self):
@@ -64,6 +71,7 @@ class Comment(SoftDeletetable, models.Model):
     class Meta:
         indexes = [
             models.Index(fields=["deleted_at"]),
+            live_index("post", "created_at", name="comment_live_post_created_idx"),
         ]
 
 
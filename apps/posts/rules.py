@@ -1,6 +1,8 @@
 import rules
 from django.shortcuts import get_object_or_404
 
+from lib.models import rule_cache
+
 from .models import Post
 
 
@@ -10,7 +12,12 @@ def can_edit_post(user, post_or_post_id):
         post = get_object_or_404(Post, id=post_or_post_id)
     else:
         post = post_or_post_id
-    return user == post.user
+    return user.is_authenticated and user.id == post.user_id
+
+
+def editable_posts(user):
+    return Post.objects.filter(user=user)
 
 
 rules.add_rule("can_edit_post", can_edit_post)
+rule_cache.add_object_rule("can_edit_post", Post, editable_posts)
@@ -1,22 +1,68 @@
-from django.db.models import Sum
-from django.db.models.signals import post_delete, post_save
+from django.db.models import Count, Sum
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
+from apps.companies.counters import rate
 from apps.posts.models import Post
+from lib.models.soft_delete import soft_deleted
+
+SCORE_FIELDS = {"company", "score", "deleted_at"}
+
+
+def _rating(company_id, score, deleted_at):
+    # 未刪除的評論才算進公司評分
+    if deleted_at is not None:
+        return None
+    return company_id, score
+
+
+@receiver(pre_save, sender=Post)
+def post_rating_before(sender, instance, update_fields=None, **kwargs):
+    instance._rating_before = None
+    if instance.pk is None:
+        return
+    if update_fields is not None and not SCORE_FIELDS & set(update_fields):
+        instance._rating_before = _rating(
+            instance.company_id, instance.score, instance.deleted_at
+        )
+        return
+    row = (
+        Post._base_manager.filter(pk=instance.pk)
+        .values_list("company_id", "score", "deleted_at")
+        .first()
+    )
+    if row is not None:
+        instance._rating_before = _rating(*row)
 
 
 @receiver(post_save, sender=Post)
+def company_rating(sender, instance, **kwargs):
+    before = getattr(instance, "_rating_before", None)
+    after = _rating(instance.company_id, instance.score, instance.deleted_at)
+    if before == after:
+        return
+    if before is not None and after is not None and before[0] == after[0]:
+        rate(after[0], 0, after[1] - before[1])
+        return
+    if before is not None:
+        rate(before[0], -1, -before[1])
+    if after is not None:
+        rate(after[0], 1, after[1])
+
+
 @receiver(post_delete, sender=Post)
-def calc_score(sender, instance, created, **kwargs):
-    company = instance.company
-    posts = Post.objects.filter(company=company)
-    post_count = posts.count()
-    post_score = posts.aggregate(score=Sum("score"))["score"]
-
-    if post_count > 0:
-        average_score = post_score / post_count
-    else:
-        average_score = 0
-
-    company.score = average_score
-    company.save()
+def company_rating_delete(sender, instance, **kwargs):
+    if instance.deleted_at is None:
+        rate(instance.company_id, -1, -instance.score)
+
+
+@receiver(soft_deleted, sender=Post)
+def posts_soft_deleted(sender, pks, **kwargs):
+    ratings = (
+        Post._base_manager.filter(pk__in=pks)
+        .values("company_id")
+        .annotate(count=Count("*"), total=Sum("score"))
+        .order_by()
+    )
+    for rating in ratings:
+        rate(rating["company_id"], -rating["count"], -rating["total"])
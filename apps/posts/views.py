@@ -4,7 +4,8 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, redirect, render, reverse
 from django.views.decorators.http import require_POST
 
-from lib.models.paginate import paginate_queryset
+from lib.models.paginate import paginate_cursor
+from lib.models.rule_cache import get_cached_object_or_404
 from lib.models.rule_required import rule_required
 
 from .forms.posts_form import CommentForm, PostForm
@@ -12,12 +13,11 @@ from .models import Comment, LikeLog, Post
 
 
 def index(request):
-    posts = Post.objects.order_by("-created_at")
-    posts_with_permissions = [
+    page_obj = paginate_cursor(request, Post.objects.all(), 10)
+    page_obj.object_list = [
         {"post": post, "can_edit": rules.test_rule("can_edit_post", request.user, post)}
-        for post in posts
+        for post in page_obj
     ]
-    page_obj = paginate_queryset(request, posts_with_permissions, 10)
     return render(request, "posts/index.html", {"page_obj": page_obj})
 
 
@@ -60,7 +60,7 @@ def show(request, id):
 
 @rule_required("can_edit_post")
 def edit(request, id):
-    post = get_object_or_404(Post, id=id)
+    post = get_cached_object_or_404(request, Post, id)
 
     if request.method == "POST":
         form = PostForm(request.POST, instance=post)
@@ -79,7 +79,7 @@ def edit(request, id):
 def delete(request, id):
     post = get_object_or_404(Post, id=id)
     company = post.company
-    post.mark_delete()
+    post.mark_delete(cascade=True)
     messages.success(request, "刪除成功")
     return redirect(reverse("companies:post_index", args=[company.id]))
 
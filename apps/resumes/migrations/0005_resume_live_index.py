@@ -0,0 +1,21 @@
+# Generated by Django 5.1.1 on 2026-10-18 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resumes", "0004_resume_original_filename"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="resume",
+            index=models.Index(
+                condition=models.Q(("deleted_at", None)),
+                fields=["userinfo", "-uploaded_at"],
+                name="resume_live_userinfo_idx",
+            ),
+        ),
+    ]
@@ -1,7 +1,7 @@
 from django.db import models
 
 from apps.users.models import UserInfo
-from lib.models.soft_delete import SoftDeleteManager, SoftDeletetable
+from lib.models.soft_delete import SoftDeleteManager, SoftDeletetable, live_index
 
 
 class Resume(SoftDeletetable, models.Model):
@@ -19,6 +19,7 @@ class Resume(SoftDeletetable, models.Model):
     class Meta:
         indexes = [
             models.Index(fields=["deleted_at"]),
+            live_index("userinfo", "-uploaded_at", name="resume_live_userinfo_idx"),
         ]
 
     def __str__(self):
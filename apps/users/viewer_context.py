@@ -0,0 +1,83 @@
+from apps.companies.models import CompanyFavorite
+from apps.jobs.models import Job_Resume, JobFavorite
+from apps.resumes.models import Resume
+from lib.models import rule_cache
+
+
+class ViewerContext:
+    """
+    目前使用者對一頁職缺 / 公司卡片的狀態（收藏、應徵、可編輯）。
+    每次 load_* 以集合查詢一次載入，之後的判斷皆為 O(1)。
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.user = request.user
+        self.favorited_job_ids = set()
+        self.applied_job_ids = set()
+        self.editable_job_ids = set()
+        self.favorited_company_ids = set()
+        self.editable_company_ids = set()
+        self._loaded_job_ids = set()
+        self._loaded_company_ids = set()
+
+    @classmethod
+    def for_request(cls, request):
+        if not hasattr(request, "_viewer_context"):
+            request._viewer_context = cls(request)
+        return request._viewer_context
+
+    def load_jobs(self, job_ids):
+        job_ids = set(job_ids) - self._loaded_job_ids
+        self._loaded_job_ids |= job_ids
+        if not job_ids or not self.user.is_authenticated:
+            return self
+
+        self.editable_job_ids |= rule_cache.permitted_ids(
+            self.request, "can_edit_job", job_ids
+        )
+
+        self.favorited_job_ids |= set(
+            JobFavorite.objects.filter(user=self.user, job_id__in=job_ids).values_list(
+                "job_id", flat=True
+            )
+        )
+        self.applied_job_ids |= set(
+            Job_Resume.objects.filter(
+                job_id__in=job_ids,
+                resume__in=Resume.objects.filter(userinfo__user=self.user),
+            ).values_list("job_id", flat=True)
+        )
+        return self
+
+    def load_companies(self, company_ids):
+        company_ids = set(company_ids) - self._loaded_company_ids
+        self._loaded_company_ids |= company_ids
+        if not company_ids or not self.user.is_authenticated:
+            return self
+
+        self.editable_company_ids |= rule_cache.permitted_ids(
+            self.request, "can_edit_company", company_ids
+        )
+
+        self.favorited_company_ids |= set(
+            CompanyFavorite.objects.filter(
+                user=self.user, company_id__in=company_ids
+            ).values_list("company_id", flat=True)
+        )
+        return self
+
+    def job_favorited(self, job_id):
+        return job_id in self.favorited_job_ids
+
+    def job_applied(self, job_id):
+        return job_id in self.applied_job_ids
+
+    def can_edit_job(self, job_id):
+        return job_id in self.editable_job_ids
+
+    def company_favorited(self, company_id):
+        return company_id in self.favorited_company_ids
+
+    def can_edit_company(self, company_id):
+        return company_id in self.editable_company_ids
@@ -20,8 +20,10 @@ from social_core.exceptions import AuthCanceled
 from social_django.views import complete
 
 from apps.companies.forms.companies_form import CompanyForm
+from apps.companies.logos import logo_url
 from apps.companies.models import Company, CompanyFavorite
-from apps.jobs.models import Job, Job_Resume, JobFavorite
+from apps.jobs.cards import card_dict, load_cards
+from apps.jobs.models import Job, Job_Resume, JobFavorite, JobRecommendation
 from apps.posts.models import Post
 from apps.resumes.models import Resume
 from lib.models.paginate import paginate_queryset
@@ -32,6 +34,7 @@ from lib.utils.models.defined import LOCATION_CHOICES
 from .forms import CustomUserCreationForm, UserInfoForm
 from .forms.users_form import PasswordResetForm
 from .models import Notification, User, UserInfo
+from .viewer_context import ViewerContext
 
 
 def index(request):
@@ -64,8 +67,8 @@ def index(request):
             return render(request, "users/register.html", {"form": form})
 
     locations = LOCATION_CHOICES
-    jobs = get_popular_jobs(request.user)
-    companies = get_popular_companies(request.user)
+    jobs = get_popular_jobs(request)
+    companies = get_popular_companies(request)
 
     return render(
         request,
@@ -278,17 +281,15 @@ def submit_jobs(request, job_id):
 @login_required
 def favorite_company_list(request):
     user = request.user
-    favorites = user.favorite_companies.order_by("-favorited_at")
+    favorites = user.favorite_companies.select_related("company").order_by(
+        "-favorited_at"
+    )
     favorites_data = [
         {
             "id": favorite.id,
             "company": favorite.company,
-            "post_count": Post.objects.filter(company_id=favorite.company.id).count(),
-            "images": (
-                f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{favorite.company.images}"  # 使用favorite.company
-                if favorite.company.images
-                else f"{settings.STATIC_URL}imgs/logo.png"
-            ),
+            "post_count": favorite.company.post_count,
+            "images": logo_url(favorite.company),
         }
         for favorite in favorites
     ]
@@ -303,65 +304,40 @@ def favorite_company_delete(request, id):
     return redirect("users:favorites_company_list")
 
 
-def get_popular_jobs(user):
-    location_dict = dict(LOCATION_CHOICES)
-    user_resume = []
-    if user.is_authenticated and 1 == user.type:
-        user_info = UserInfo.objects.get(user=user)
-        user_resume = Resume.objects.filter(userinfo=user_info).values_list(
-            "id", flat=True
+def get_popular_jobs(request):
+    job_ids = []
+    if request.user.is_authenticated:
+        job_ids = list(
+            JobRecommendation.objects.filter(user=request.user, job__deleted_at=None)
+            .order_by("-score")
+            .values_list("job_id", flat=True)[:4]
+        )
+    if not job_ids:
+        job_ids = list(
+            Job.objects.order_by("-view_count", "-created_at").values_list(
+                "id", flat=True
+            )[:4]
         )
 
-    jobs = Job.objects.order_by("-created_at")[:4]
-    jobs_data = [
-        {
-            "id": job.id,
-            "title": job.title,
-            "company": job.company.title,
-            "company_id": job.company.id,
-            "type": job.type,
-            "location_label": location_dict.get(job.location),
-            "location": job.location,
-            "salary": job.salary_range,
-            "created_at": job.created_at,
-            "favorited": (
-                JobFavorite.objects.filter(job=job, user=user).exists()
-                if user.is_authenticated
-                else False
-            ),
-            "apply": Job_Resume.objects.filter(
-                job=job, resume__in=user_resume
-            ).exists(),
-            "images": (
-                f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{job.company.images}"
-                if job.company.images
-                else f"{settings.STATIC_URL}imgs/logo.png"
-            ),
-        }
-        for job in jobs
-    ]
-    return jobs_data
+    job_cards = load_cards(job_ids)
+    viewer = ViewerContext.for_request(request).load_jobs(job_ids)
+    return [card_dict(card, viewer) for card in job_cards]
 
 
-def get_popular_companies(user):
+def get_popular_companies(request):
     companies = Company.objects.order_by("-created_at")[:4]
+    viewer = ViewerContext.for_request(request).load_companies(
+        company.id for company in companies
+    )
     companies_data = [
         {
             "id": company.id,
             "title": company.title,
             "description": company.description,
             "score": company.score,
-            "post_count": Post.objects.filter(company=company).count(),
-            "favorited": (
-                CompanyFavorite.objects.filter(company=company, user=user).exists()
-                if user.is_authenticated
-                else False
-            ),
-            "images": (
-                f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{company.images}"
-                if company.images
-                else f"{settings.STATIC_URL}imgs/logo.png"
-            ),
+            "post_count": company.post_count,
+            "favorited": viewer.company_favorited(company.id),
+            "images": logo_url(company),
         }
         for company in companies
     ]
@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 
 import dj_database_url
@@ -75,6 +76,7 @@ INSTALLED_APPS = [
     "apps.resumes",
     "apps.analytics",
     "apps.payments",
+    "apps.archive",
     "anymail",
     "storages",
     "social_django",
@@ -196,6 +198,9 @@ LOGIN_URL = reverse_lazy("users:sign_in")
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# 測試時不在背景或程序結束時寫回瀏覽次數，那時測試資料庫已經刪掉了
+JOB_VIEW_AUTO_FLUSH = sys.argv[1:2] != ["test"]
+
 AUTHENTICATION_BACKENDS = (
     "rules.permissions.ObjectPermissionBackend",
     "social_core.backends.line.LineOAuth2",
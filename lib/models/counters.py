@@ -0,0 +1,55 @@
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def bump(model, pk, field, delta=1):
+    """計數欄位用 F() 原子地加減，不先讀出來，併發時也不會互相覆蓋。"""
+    if pk is None or not delta:
+        return
+    model._base_manager.filter(pk=pk).update(**{field: F(field) + delta})
+
+
+def bump_many(model, field, deltas):
+    """deltas 為 {pk: 增減量}，同樣增減量的合成一句 UPDATE。"""
+    by_delta = {}
+    for pk, delta in deltas.items():
+        if pk is not None and delta:
+            by_delta.setdefault(delta, []).append(pk)
+    for delta, pks in by_delta.items():
+        model._base_manager.filter(pk__in=pks).update(**{field: F(field) + delta})
+
+
+def live_delta(instance, created, update_fields):
+    """
+    軟刪除的資料存檔後，計數該加一、減一還是不變：
+    新增一筆未刪除的 +1，mark_delete()（只更新 deleted_at）-1。
+    """
+    if created:
+        return 1 if instance.deleted_at is None else 0
+    if update_fields is not None and "deleted_at" in update_fields:
+        return -1 if instance.deleted_at is not None else 1
+    return 0
+
+
+def count_of(model, field, **filters):
+    """計數修復用：依 field 分組的數量子查詢，沒有資料時為 0。"""
+    counts = (
+        model._base_manager.filter(**{field: OuterRef("pk")}, **filters)
+        .order_by()
+        .values(field)
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def sum_of(model, field, column, **filters):
+    """同 count_of，改為加總 column。"""
+    totals = (
+        model._base_manager.filter(**{field: OuterRef("pk")}, **filters)
+        .order_by()
+        .values(field)
+        .annotate(total=Sum(column))
+        .values("total")
+    )
+    return Coalesce(Subquery(totals), 0)
@@ -1,4 +1,10 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
+from django.db.models import Q
 
 
 def paginate_queryset(request, queryset, items_per_page):
@@ -6,3 +12,118 @@ def paginate_queryset(request, queryset, items_per_page):
     page_number = request.GET.get("page", 1)
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+class CursorPage:
+    is_cursor = True
+
+    def __init__(self, object_list, next_query, previous_query, first_query, is_first):
+        self.object_list = object_list
+        self.next_query = next_query
+        self.previous_query = previous_query
+        self.first_query = first_query
+        self.is_first = is_first
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @property
+    def has_next(self):
+        return self.next_query is not None
+
+    @property
+    def has_previous(self):
+        return not self.is_first
+
+
+def _encode_cursor(values):
+    # 自行轉 isoformat：DjangoJSONEncoder 會把微秒截到毫秒，游標就不精確了
+    values = [
+        value.isoformat() if hasattr(value, "isoformat") else value for value in values
+    ]
+    data = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def _decode_cursor(cursor, model, fields):
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(fields):
+            return None
+        return [
+            model._meta.get_field(field).to_python(value)
+            for field, value in zip(fields, values)
+        ]
+    except (binascii.Error, ValueError, TypeError, ValidationError):
+        return None
+
+
+def _reverse(ordering):
+    return [order[1:] if order.startswith("-") else f"-{order}" for order in ordering]
+
+
+def _keyset_filter(ordering, values):
+    # (a, b) 排在游標之後：a 超過，或 a 相同且 b 超過，依此類推
+    condition = Q()
+    equal = {}
+    for order, value in zip(ordering, values):
+        field = order.lstrip("-")
+        lookup = "lt" if order.startswith("-") else "gt"
+        condition |= Q(**equal, **{f"{field}__{lookup}": value})
+        equal[field] = value
+    return condition
+
+
+def paginate_cursor(request, queryset, items_per_page, ordering=("-created_at", "-id")):
+    """
+    以 (created_at, id) 為游標的分頁，不用 OFFSET 也不做 COUNT(*)，
+    第 N 頁的成本與第一頁相同。cursor 取它之後的一頁，before 取它之前的一頁。
+    """
+    fields = [order.lstrip("-") for order in ordering]
+    model = queryset.model
+    after = _decode_cursor(request.GET.get("cursor"), model, fields)
+    before = None if after else _decode_cursor(request.GET.get("before"), model, fields)
+
+    if before is not None:
+        # 往回翻：反向排序取游標之前的幾筆，再轉回原本的順序
+        ordering = _reverse(ordering)
+        queryset = queryset.filter(_keyset_filter(ordering, before))
+    elif after is not None:
+        queryset = queryset.filter(_keyset_filter(ordering, after))
+    object_list = list(queryset.order_by(*ordering)[: items_per_page + 1])
+    has_more = len(object_list) > items_per_page
+    object_list = object_list[:items_per_page]
+
+    if before is not None:
+        object_list.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, after is not None
+
+    params = request.GET.copy()
+    params.pop("cursor", None)
+    params.pop("before", None)
+    first_query = params.urlencode()
+
+    def query(name, obj):
+        cursor_params = params.copy()
+        cursor_params[name] = _encode_cursor([getattr(obj, field) for field in fields])
+        return cursor_params.urlencode()
+
+    next_query = previous_query = None
+    if object_list and has_next:
+        next_query = query("cursor", object_list[-1])
+    if object_list and has_previous:
+        previous_query = query("before", object_list[0])
+
+    return CursorPage(
+        object_list, next_query, previous_query, first_query, not has_previous
+    )
@@ -0,0 +1,72 @@
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+_object_rules = {}
+
+
+def add_object_rule(rule_name, model, queryset_fn):
+    # queryset_fn(user) 回傳該使用者通過此規則的物件 queryset；
+    # model 用來分辨沒有權限與物件不存在
+    _object_rules[rule_name] = (model, queryset_fn)
+
+
+def has_object_rule(rule_name):
+    return rule_name in _object_rules
+
+
+def _results(request, rule_name):
+    if not hasattr(request, "_rule_results"):
+        request._rule_results = {}
+    return request._rule_results.setdefault(rule_name, {})
+
+
+def _objects(request):
+    if not hasattr(request, "_rule_objects"):
+        request._rule_objects = {}
+    return request._rule_objects
+
+
+def permitted_ids(request, rule_name, target_ids):
+    target_ids = set(target_ids)
+    results = _results(request, rule_name)
+    missing = target_ids - results.keys()
+
+    if missing:
+        allowed = set()
+        if request.user.is_authenticated:
+            _, queryset_fn = _object_rules[rule_name]
+            allowed = set(
+                queryset_fn(request.user)
+                .filter(pk__in=missing)
+                .values_list("pk", flat=True)
+            )
+        for target_id in missing:
+            results[target_id] = target_id in allowed
+
+    return {target_id for target_id in target_ids if results[target_id]}
+
+
+def permitted_object(request, rule_name, target_id):
+    """回傳使用者通過規則的物件，沒有權限時回傳 None，物件不存在時 404。"""
+    model, queryset_fn = _object_rules[rule_name]
+    results = _results(request, rule_name)
+
+    obj = None
+    if results.get(target_id) is not False and request.user.is_authenticated:
+        obj = queryset_fn(request.user).filter(pk=target_id).first()
+    results[target_id] = obj is not None
+
+    if obj is None:
+        # 只在沒通過時多查一次，不存在的 id 維持原本的 404
+        if not model._default_manager.filter(pk=target_id).exists():
+            raise Http404
+        return None
+    _objects(request)[(obj.__class__, obj.pk)] = obj
+    return obj
+
+
+def get_cached_object_or_404(request, model, pk):
+    obj = _objects(request).get((model, pk))
+    if obj is None:
+        obj = get_object_or_404(model, pk=pk)
+    return obj
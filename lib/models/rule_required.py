@@ -4,6 +4,8 @@ import rules
 from django.http import HttpResponseForbidden
 from django.shortcuts import render
 
+from lib.models import rule_cache
+
 
 def rule_required(rule_name):
     def decorator(view_func):
@@ -11,7 +13,12 @@ def rule_required(rule_name):
         def _wrapped_view(request, *args, **kwargs):
             user = request.user
             target_id = kwargs.get("id")
-            if not rules.test_rule(rule_name, user, target_id):
+            if rule_cache.has_object_rule(rule_name) and target_id is not None:
+                # 通過的物件會暫存在 request，view 以 get_cached_object_or_404 取回
+                allowed = rule_cache.permitted_object(request, rule_name, target_id)
+            else:
+                allowed = rules.test_rule(rule_name, user, target_id)
+            if not allowed:
                 return render(request, "no_permission.html")
             return view_func(request, *args, **kwargs)
 
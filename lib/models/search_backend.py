@@ -0,0 +1,64 @@
+from functools import reduce
+from operator import or_
+
+from django.db import connection, migrations
+from django.db.models import Q
+
+
+class IcontainsSearchBackend:
+    # SQLite 等其他資料庫：維持原本的 icontains 比對與排序
+
+    def q(self, fields, term):
+        return reduce(or_, (Q(**{f"{field}__icontains": term}) for field in fields))
+
+    def filter(self, queryset, fields, term):
+        if not term:
+            return queryset
+        return queryset.filter(self.q(fields, term))
+
+    def order_by_relevance(self, queryset, field, term, *fallback_ordering):
+        return queryset.order_by(*fallback_ordering)
+
+
+class TrigramSearchBackend(IcontainsSearchBackend):
+    # PostgreSQL：icontains 會產生 UPPER(col::text) LIKE UPPER('%term%')，
+    # 由 trigram_index() 建立的 pg_trgm GIN 索引處理，不再是全表掃描
+
+    def order_by_relevance(self, queryset, field, term, *fallback_ordering):
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        if not term:
+            return queryset.order_by(*fallback_ordering)
+        return queryset.annotate(relevance=TrigramSimilarity(field, term)).order_by(
+            "-relevance", *fallback_ordering
+        )
+
+
+def get_search_backend():
+    if connection.vendor == "postgresql":
+        return TrigramSearchBackend()
+    return IcontainsSearchBackend()
+
+
+def trigram_index(table, column):
+    """
+    migration 用：在 PostgreSQL 建立 UPPER(column::text) 的 gin_trgm_ops 索引，
+    其他資料庫略過。
+    """
+    index_name = f"{table}_{column}_trgm_idx"
+
+    def forwards(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{table}" '
+            f'USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+    def backwards(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{index_name}"')
+
+    return migrations.RunPython(forwards, backwards)
@@ -1,18 +1,62 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
+from django.dispatch import Signal
 from django.utils import timezone
 
+# 整批軟刪除走 UPDATE，不會觸發 post_save，需要同步的地方改接這個 signal
+soft_deleted = Signal()
 
-class SoftDeleteManager(models.Manager):
+
+def _cascade(model, pks):
+    """把 model.soft_delete_cascade 列出的反向關聯（例如公司底下的職缺）一併軟刪除。"""
+    for name in getattr(model, "soft_delete_cascade", ()):
+        relation = model._meta.get_field(name)
+        related_model = relation.related_model
+        related_model._default_manager.filter(
+            **{f"{relation.field.name}__in": pks}
+        ).mark_delete(cascade=True)
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    def mark_delete(self, cascade=False):
+        """每個 model 只下一句 UPDATE；cascade=True 時先處理關聯資料，全部在同一個 transaction。"""
+        with transaction.atomic(using=self.db):
+            pks = list(self.filter(deleted_at=None).values_list("pk", flat=True))
+            if not pks:
+                return 0
+            if cascade:
+                _cascade(self.model, pks)
+            count = self.model._base_manager.filter(pk__in=pks).update(
+                deleted_at=timezone.now()
+            )
+            soft_deleted.send(sender=self.model, pks=pks)
+        return count
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
     def get_queryset(self):
         return super().get_queryset().filter(deleted_at=None)
 
 
 class SoftDeletetable:
-    def mark_delete(self):
-        self.deleted_at = timezone.now()
-        self.save()
+    soft_delete_cascade = ()
+
+    def mark_delete(self, cascade=False):
+        with transaction.atomic():
+            if cascade:
+                _cascade(type(self), [self.pk])
+            self.deleted_at = timezone.now()
+            self.save(update_fields=["deleted_at"])
 
     objects = SoftDeleteManager()
 
     class Meta:
         abstract = True
+
+
+def live_index(*fields, name):
+    """
+    只涵蓋未刪除資料的部分索引（WHERE deleted_at IS NULL），
+    fields 依照查詢的篩選與排序，SoftDeleteManager 的查詢才用得到。
+    """
+    return models.Index(fields=list(fields), name=name, condition=Q(deleted_at=None))
@@ -0,0 +1,59 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_batches = threading.local()
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "BACKGROUND_WORKERS", 2),
+    thread_name_prefix="background",
+)
+
+
+def _run(func, args):
+    close_old_connections()
+    try:
+        func(*args)
+    except Exception:
+        logger.exception("背景工作 %s%r 失敗", func.__name__, args)
+    finally:
+        close_old_connections()
+
+
+def run_in_background(func, *args):
+    """在背景執行緒執行；BACKGROUND_ASYNC=False 時直接執行（測試用）。"""
+    if getattr(settings, "BACKGROUND_ASYNC", True):
+        _executor.submit(_run, func, args)
+    else:
+        func(*args)
+
+
+def run_after_commit(func, *args):
+    """
+    交易提交後才在背景執行，不卡住請求。
+    程序中途結束時工作會遺失，呼叫端要有可以補跑的指令。
+    """
+    transaction.on_commit(lambda: run_in_background(func, *args))
+
+
+def run_batch_after_commit(func, item):
+    """
+    交易提交後以 func(items) 執行一次，同一個交易內的多次呼叫合併成一批。
+    每次呼叫都登記 on_commit，只有第一個真的執行；交易回滾時登記一起作廢，
+    收集到的 item 留到下次提交一起處理，所以 func 要以資料庫現況為準。
+    """
+    batches = _batches.__dict__.setdefault("pending", {})
+    batch = batches.setdefault(func, set())
+    batch.add(item)
+
+    def flush():
+        if batches.get(func) is batch:
+            del batches[func]
+            func(batch)
+
+    transaction.on_commit(flush, robust=True)
@@ -0,0 +1,38 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0
+# 網格大小（度），0.1 度約 11 公里
+GRID_SIZE = 0.1
+KM_PER_DEGREE = 111.32
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def grid_cell(lat, lng):
+    if lat is None or lng is None:
+        return None
+    return f"{math.floor(float(lat) / GRID_SIZE)}:{math.floor(float(lng) / GRID_SIZE)}"
+
+
+def cells_within(lat, lng, radius_km):
+    """涵蓋以 (lat, lng) 為中心、半徑 radius_km 的外接方框的所有網格。"""
+    lat_delta = radius_km / KM_PER_DEGREE
+    lng_delta = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+
+    lat_from = math.floor((lat - lat_delta) / GRID_SIZE)
+    lat_to = math.floor((lat + lat_delta) / GRID_SIZE)
+    lng_from = math.floor((lng - lng_delta) / GRID_SIZE)
+    lng_to = math.floor((lng + lng_delta) / GRID_SIZE)
+
+    return [
+        f"{lat_cell}:{lng_cell}"
+        for lat_cell in range(lat_from, lat_to + 1)
+        for lng_cell in range(lng_from, lng_to + 1)
+    ]
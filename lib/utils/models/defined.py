@@ -1,6 +1,10 @@
+import logging
+
 import requests
 from django.conf import settings
 
+logger = logging.getLogger(__name__)
+
 LOCATION_CHOICES = [
     ("Keelung", "基隆"),
     ("Taipei", "台北"),
@@ -25,16 +29,28 @@ LOCATION_CHOICES = [
 ]
 
 
-def fetch_coordinates(address):
+def fetch_coordinates(address, timeout=5):
+    """
+    地址轉經緯度，查不到回傳 (None, None)；
+    連線失敗、逾時或 API 回傳錯誤時回傳 None，呼叫端不應當成查不到而快取結果。
+    """
     api_key = settings.GOOGLE_MAPS_API_KEY
     base_url = "https://maps.googleapis.com/maps/api/geocode/json"
     params = {"address": address, "key": api_key}
 
-    response = requests.get(base_url, params=params)
-
-    if response.status_code == 200:
+    try:
+        response = requests.get(base_url, params=params, timeout=timeout)
+        response.raise_for_status()
         data = response.json()
-        if data["results"]:
-            location = data["results"][0]["geometry"]["location"]
-            return location["lat"], location["lng"]
-        return None, None
+    except (requests.RequestException, ValueError):
+        logger.warning("地址查詢失敗：%s", address, exc_info=True)
+        return None
+
+    # 超過配額、金鑰錯誤等也是 200，狀態寫在 status
+    if data.get("status") not in ("OK", "ZERO_RESULTS"):
+        logger.warning("地址查詢失敗：%s（%s）", address, data.get("status"))
+        return None
+    if data.get("results"):
+        location = data["results"][0]["geometry"]["location"]
+        return location["lat"], location["lng"]
+    return None, None
@@ -9,5 +9,7 @@ import "./notify.js";
 import "./date.js";
 import "./referrer.js";
 import "./map.js";
+import "./autocomplete.js";
+import "./nearby.js";
 
 Alpine.start();
@@ -0,0 +1,17 @@
+import Alpine from "alpinejs";
+
+Alpine.data("autocomplete", (url) => ({
+  suggestions: [],
+
+  async fetchSuggestions(query) {
+    if (!query.trim()) {
+      this.suggestions = [];
+      return;
+    }
+
+    let response = await fetch(`${url}?q=${encodeURIComponent(query)}`);
+    let data = await response.json();
+
+    this.suggestions = data.suggestions;
+  },
+}));
@@ -17,6 +17,9 @@ import {
   faTrashCan as fasTrashCan,
   faPlus as fasPlus,
   faLink as fasLink,
+  faRoute as fasRoute,
+  faLocationCrosshairs as fasLocationCrosshairs,
+  faEye as fasEye,
 } from "@fortawesome/free-solid-svg-icons";
 import {
   faThumbsDown as farThumbsDown,
@@ -53,7 +56,10 @@ library.add(
   farCalendarDays,
   farFileLines,
   farEnvelope,
-  fasLink
+  fasLink,
+  fasRoute,
+  fasLocationCrosshairs,
+  fasEye
 );
 dom.i2svg();
 
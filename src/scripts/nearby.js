@@ -0,0 +1,22 @@
+import Alpine from "alpinejs";
+
+Alpine.data("nearby", (url) => ({
+  locating: false,
+
+  locate() {
+    if (!navigator.geolocation) {
+      return;
+    }
+
+    this.locating = true;
+    navigator.geolocation.getCurrentPosition(
+      (position) => {
+        let { latitude, longitude } = position.coords;
+        window.location.href = `${url}?lat=${latitude}&lng=${longitude}`;
+      },
+      () => {
+        this.locating = false;
+      },
+    );
+  },
+}));